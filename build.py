@@ -1,33 +1,185 @@
-"""Build DeadlockRPC into a standalone binary."""
+"""Build DeadlockRPC into a standalone binary.
 
+Profiles:
+  onefile    single self-extracting binary (default). Unpacks the whole bundle
+             into a temp _MEIPASS directory on every launch.
+  faststart  one-folder build. The runtime stays unpacked next to the exe, so
+             launches skip extraction entirely. Also drops stdlib packages and
+             PIL image plugins the app never uses.
+
+  python build.py [--profile onefile|faststart|all] [--measure [N]]
+
+--measure launches each built artifact N times (default 3) and reports the
+time from process start until the log watcher is running. Discord has to be
+running for the app to get that far; Deadlock is not launched while measuring.
+"""
+
+import argparse
+import os
+import statistics
 import subprocess
 import sys
+import time
+from pathlib import Path
 
-def main():
-    sep = ";" if sys.platform == "win32" else ":"
+OUTPUT_NAME = "DeadlockRPC"
+IS_WINDOWS = sys.platform == "win32"
+
+# stdlib packages nothing in src/ imports (directly or via pypresence/pystray/requests)
+FASTSTART_EXCLUDES = [
+    "tkinter", "unittest", "pydoc", "pydoc_data", "doctest", "lib2to3",
+    "distutils", "xmlrpc", "ftplib", "imaplib", "poplib", "smtplib",
+    "mailbox", "turtle", "turtledemo", "curses", "idlelib", "ensurepip",
+    "venv", "test",
+]
+
+# The tray only needs to open favicon.ico (or draw a fallback square).
+FASTSTART_PIL_EXCLUDES = [
+    f"PIL.{name}" for name in (
+        "JpegImagePlugin", "GifImagePlugin", "TiffImagePlugin", "WebPImagePlugin",
+        "PsdImagePlugin", "PdfImagePlugin", "PdfParser", "EpsImagePlugin",
+        "Jpeg2KImagePlugin", "TgaImagePlugin", "PcxImagePlugin", "PpmImagePlugin",
+        "SgiImagePlugin", "SpiderImagePlugin", "SunImagePlugin", "XbmImagePlugin",
+        "XpmImagePlugin", "FliImagePlugin", "FpxImagePlugin", "GbrImagePlugin",
+        "IcnsImagePlugin", "ImImagePlugin", "ImtImagePlugin", "IptcImagePlugin",
+        "McIdasImagePlugin", "MicImagePlugin", "MpegImagePlugin", "MpoImagePlugin",
+        "MspImagePlugin", "PalmImagePlugin", "PcdImagePlugin", "PixarImagePlugin",
+        "QoiImagePlugin", "WmfImagePlugin", "XVThumbImagePlugin", "DdsImagePlugin",
+        "BlpImagePlugin", "BufrStubImagePlugin", "CurImagePlugin", "DcxImagePlugin",
+        "FitsImagePlugin", "GribStubImagePlugin", "Hdf5StubImagePlugin",
+        "ImageQt", "ImageTk", "ImageShow", "ImageCms", "ImageMath",
+    )
+]
+
+# main.py and friends load these through profiling.lazy_import, which PyInstaller can't see
+LAZY_MODULES = [
+    "clock", "condebug", "config_reload", "console_log", "events", "game_state",
+    "hero_data", "history", "log_stream", "metrics", "presence", "shm_state", "sinks", "systray", "tracing",
+    # third-party, loaded the same way by presence.py / systray.py so they're timed
+    "pypresence", "pystray", "PIL.Image",
+]
 
-    is_windows = sys.platform == "win32"
-    output_name = "DeadlockRPC"
+# logged by LogWatcher.start once the watcher thread is up
+READY_MARKER = "Watching for"
+
+
+def _pyinstaller_cmd(profile: str) -> list[str]:
+    sep = ";" if IS_WINDOWS else ":"
 
     cmd = [
         sys.executable, "-m", "PyInstaller",
-        "--onefile",
-        "--name", output_name,
+        "--noconfirm",
+        "--name", OUTPUT_NAME,
         f"--add-data=src/config.json{sep}.",
         f"--add-data=src/favicon.ico{sep}.",
-        "src/main.py",
+        "--paths", "src",
     ]
+    for mod in LAZY_MODULES:
+        cmd += ["--hidden-import", mod]
+
+    if profile == "faststart":
+        cmd += ["--onedir", "--distpath", "dist/faststart"]
+        for mod in FASTSTART_EXCLUDES + FASTSTART_PIL_EXCLUDES:
+            cmd += ["--exclude-module", mod]
+    else:
+        cmd += ["--onefile", "--distpath", "dist"]
 
     # --noconsole hides the terminal window on Windows; on Linux it has no effect
     # but including it would suppress stdout, so skip it there.
-    if is_windows:
+    if IS_WINDOWS:
         cmd += ["--noconsole", "--icon=src/favicon.ico"]
 
+    cmd.append("src/main.py")
+    return cmd
+
+
+def artifact_path(profile: str) -> Path:
+    exe = f"{OUTPUT_NAME}.exe" if IS_WINDOWS else OUTPUT_NAME
+    if profile == "faststart":
+        return Path("dist/faststart") / OUTPUT_NAME / exe
+    return Path("dist") / exe
+
+
+def build(profile: str) -> Path:
+    cmd = _pyinstaller_cmd(profile)
     print("Running:", " ".join(cmd))
     subprocess.run(cmd, check=True)
 
-    artifact = f"dist/{output_name}.exe" if is_windows else f"dist/{output_name}"
-    print(f"\nDone! → {artifact}")
+    artifact = artifact_path(profile)
+    print(f"\nDone! ({profile}) → {artifact}")
+    return artifact
+
+
+def _launch_to_ready(artifact: Path, timeout: float) -> float | None:
+    """Launch once and return seconds until the watcher is running, or None."""
+    # logs/ lives next to the executable in both profiles
+    log_file = artifact.parent / "logs" / "deadlock_rpc.log"
+    offset = log_file.stat().st_size if log_file.exists() else 0
+
+    env = dict(os.environ, DEADLOCK_RPC_NO_LAUNCH="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen([str(artifact)], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if log_file.exists():
+                with open(log_file, "r", encoding="utf-8", errors="replace") as f:
+                    f.seek(offset)
+                    if READY_MARKER in f.read():
+                        return time.perf_counter() - start
+            if proc.poll() is not None:
+                return None
+            time.sleep(0.02)
+        return None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def measure(profile: str, runs: int, timeout: float = 60.0) -> None:
+    artifact = artifact_path(profile)
+    if not artifact.exists():
+        print(f"{profile}: {artifact} not built, skipping")
+        return
+
+    samples = []
+    for i in range(runs):
+        dt = _launch_to_ready(artifact, timeout)
+        if dt is None:
+            print(f"{profile}: run {i + 1} never reached the watcher (is Discord running?)")
+            continue
+        samples.append(dt)
+
+    if samples:
+        print(
+            f"{profile:<10} launch→watcher ready: "
+            f"median {statistics.median(samples) * 1000:.0f} ms, "
+            f"min {min(samples) * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms "
+            f"({len(samples)}/{runs} runs)"
+        )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build DeadlockRPC")
+    ap.add_argument("--profile", choices=("onefile", "faststart", "all"), default="onefile")
+    ap.add_argument("--measure", nargs="?", type=int, const=3, default=0, metavar="N",
+                    help="launch each artifact N times and time launch → watcher ready")
+    ap.add_argument("--no-build", action="store_true", help="only measure existing artifacts")
+    args = ap.parse_args()
+
+    profiles = ["onefile", "faststart"] if args.profile == "all" else [args.profile]
+
+    if not args.no_build:
+        for profile in profiles:
+            build(profile)
+
+    if args.measure:
+        print()
+        for profile in profiles:
+            measure(profile, args.measure)
+
 
 if __name__ == "__main__":
     main()
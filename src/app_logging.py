@@ -0,0 +1,95 @@
+"""
+Application logging.
+
+Records are handed to a QueueHandler and written by a QueueListener thread, so
+the log-watcher and presence threads never block on disk I/O. The log file is
+rotated by size and old segments are gzip-compressed (deadlock_rpc.log.1.gz,
+.2.gz, ...), which keeps logs/ bounded at roughly
+max_bytes + backup_count compressed segments.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+_listener: QueueListener | None = None
+
+
+def _gz_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gz_rotator(source: str, dest: str) -> None:
+    """Compress the segment being rotated out. Runs on the listener thread."""
+    try:
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+    except OSError:
+        # fall back to a plain rename so rotation still bounds the live file
+        if os.path.exists(source):
+            os.replace(source, dest)
+
+
+def setup(
+    log_file: Path,
+    level: int = logging.INFO,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+) -> None:
+    """Route the root logger through a queue to stdout + a rotating file."""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.namer = _gz_namer
+    file_handler.rotator = _gz_rotator
+
+    handlers: list[logging.Handler] = [file_handler]
+    if sys.stdout is not None:  # None under --noconsole on Windows
+        handlers.insert(0, logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,80 @@
+"""
+Clock abstraction shared by GameState, LogWatcher and DeadlockRPC.
+
+SYSTEM_CLOCK is the wall clock used by the app. SimulatedClock never blocks:
+sleep() just moves time forward. line_time() reads the timestamp at the start
+of a console.log line ("03/12 18:22:33 ..."), which the event pipeline stamps
+on each LogEvent and LogWatcher.apply_event() passes to advance_to(), so
+replays and soak tests run at full speed and still stamp matches with the
+time they actually happened.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from datetime import datetime
+from typing import Protocol
+
+
+class Clock(Protocol):
+    def time(self) -> float: ...
+
+    def sleep(self, seconds: float) -> None: ...
+
+
+class SystemClock:
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+SYSTEM_CLOCK = SystemClock()
+
+# -condebug prefixes lines with "MM/DD HH:MM:SS"
+_LINE_TS = re.compile(r"(\d\d)/(\d\d) (\d\d):(\d\d):(\d\d)")
+
+_HALF_YEAR = 183 * 24 * 3600
+
+
+class SimulatedClock:
+    def __init__(self, start: float = 0.0, year: int | None = None) -> None:
+        self.now = start
+        self.year = year or datetime.now().year
+        self._last_prefix: str | None = None
+        self._last_ts = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+    def advance_to(self, t: float) -> None:
+        if t > self.now:
+            self.now = t
+
+    def line_time(self, line: str) -> float | None:
+        """Epoch of a line's timestamp prefix (local time), or None if it has none."""
+        if len(line) < 14 or line[2] != "/":
+            return None
+        prefix = line[:14]
+        if prefix == self._last_prefix:
+            return self._last_ts
+        m = _LINE_TS.match(prefix)
+        if not m:
+            return None
+        month, day, hour, minute, second = map(int, m.groups())
+        try:
+            ts = datetime(self.year, month, day, hour, minute, second).timestamp()
+        except ValueError:
+            return None
+        # logs carry no year; a jump back of months means we crossed New Year
+        if self._last_prefix is not None and ts < self._last_ts - _HALF_YEAR:
+            self.year += 1
+            ts = datetime(self.year, month, day, hour, minute, second).timestamp()
+        self._last_prefix = prefix
+        self._last_ts = ts
+        return ts
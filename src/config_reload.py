@@ -0,0 +1,106 @@
+"""
+Hot reload of config.json.
+
+A background thread polls the config file; when its content hash changes the
+new config is parsed, validated and its pattern engine compiled on that
+thread (compiled engines are cached by content hash, so reverting to an
+earlier config is free). Only then is it handed to DeadlockRPC.apply_config,
+which swaps it into the running LogWatcher between lines and into
+DiscordRPC. A config that fails validation is logged and ignored; the old
+one keeps running. No restart, no resync.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from console_log import PatternEngine, compile_engine
+
+if TYPE_CHECKING:
+    from main import DeadlockRPC
+
+logger = logging.getLogger(__name__)
+
+
+def validate(cfg: object) -> PatternEngine:
+    """Raise ValueError if cfg can't run; otherwise return its compiled engine."""
+    if not isinstance(cfg, dict):
+        raise ValueError("top level must be an object")
+    patterns = cfg.get("log_patterns", {})
+    if not isinstance(patterns, dict) or not all(isinstance(v, str) for v in patterns.values()):
+        raise ValueError("log_patterns must map names to regex strings")
+    hideout_maps = cfg.get("hideout_maps", ["dl_hideout"])
+    if not isinstance(hideout_maps, list) or not all(isinstance(m, str) for m in hideout_maps):
+        raise ValueError("hideout_maps must be a list of map names")
+    map_to_mode = cfg.get("map_to_mode", {})
+    if not isinstance(map_to_mode, dict):
+        raise ValueError("map_to_mode must be an object")
+    interval = cfg.get("update_interval_seconds", 5)
+    if not isinstance(interval, (int, float)) or interval <= 0:
+        raise ValueError("update_interval_seconds must be a positive number")
+    return compile_engine(patterns, hideout_maps, map_to_mode, strict=True)
+
+
+class ConfigReloader:
+    def __init__(self, path: str | Path, app: "DeadlockRPC", poll_interval: float = 2.0):
+        self.path = Path(path)
+        self.app = app
+        self.poll_interval = poll_interval
+        self._stat: tuple[int, int] | None = None
+        self._digest: str | None = None
+        self._prime()
+
+    def _prime(self) -> None:
+        try:
+            st = self.path.stat()
+            self._stat = (st.st_mtime_ns, st.st_size)
+            self._digest = hashlib.sha256(self.path.read_bytes()).hexdigest()
+        except OSError:
+            pass
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self._loop, daemon=True, name="config-reload")
+        thread.start()
+        return thread
+
+    def _loop(self) -> None:
+        while self.app.running:
+            try:
+                self.check()
+            except Exception as e:
+                logger.error("Config reload error: %s", e)
+            time.sleep(self.poll_interval)
+
+    def check(self) -> bool:
+        """Reload if the file changed. Returns True if a new config was applied."""
+        try:
+            st = self.path.stat()
+        except OSError:
+            return False
+        stat_key = (st.st_mtime_ns, st.st_size)
+        if stat_key == self._stat:
+            return False
+        self._stat = stat_key
+
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self._digest:
+            return False  # touched, not changed
+
+        try:
+            cfg = json.loads(raw)
+            engine = validate(cfg)
+        except ValueError as e:  # JSONDecodeError is a ValueError too
+            logger.warning("Ignoring changed %s: %s", self.path.name, e)
+            return False
+
+        self._digest = digest
+        self.app.apply_config(cfg, engine)
+        logger.info("Reloaded %s", self.path.name)
+        return True
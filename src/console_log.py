@@ -3,38 +3,75 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
 import re
 import subprocess
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable, Iterator, NamedTuple
 
-from game_state import GamePhase, GameState, MatchMode
+import events
+import metrics
+import tracing
+from clock import Clock
+from game_state import GamePhase, GameSnapshot, GameState, MatchMode
 
 logger = logging.getLogger(__name__)
 
+# Patterns LogWatcher._apply dispatches on, in priority order: a line is
+# classified by the first of these that matches. local_account_id is checked
+# separately since it rides along on lines that also carry other signals.
+CHAIN_ORDER = (
+    "party_event",
+    "map_info",
+    "map_created_physics",
+    "mm_start",
+    "mm_stop",
+    "lobby_created",
+    "lobby_destroyed",
+    "spectate_broadcast",
+    "server_connect",
+    "loaded_hero",
+    "client_hero_vmdl",
+    "silver_wolf_form_on",
+    "silver_wolf_form_off",
+    "server_disconnect",
+    "loop_mode_menu",
+    "change_game_state",
+    "hideout_lobby_state",
+    "bot_init",
+    "host_activate",
+    "server_shutdown",
+    "app_shutdown",
+    "source2_shutdown",
+    "player_info",
+    "precaching_heroes",
+)
+
+# kinds after which nothing earlier in the log matters for the state
+RESET_KINDS = {"app_shutdown", "source2_shutdown"}
+
+
+class PatternEngine:
+    """Compiled log_patterns plus the map tables. Never mutated once built,
+    so one instance can be shared between watchers and swapped in whole."""
 
-class LogWatcher:
     def __init__(
         self,
-        log_path: str | Path,
-        state: GameState,
         patterns: dict[str, str],
         hideout_maps: list[str],
-        process_names: list[str],
-        resync_max_bytes: int = 100 * 1024,
         map_to_mode: dict[str, str] | None = None,
-        on_state_change: Callable[[GameState], None] | None = None,
+        registry: metrics.Registry | None = None,
     ):
-        self.log_path = Path(log_path)
-        self.state = state
-        self.on_state_change = on_state_change
+        self.problems: list[str] = []  # invalid entries that were skipped
+        # the raw inputs, so worker processes can rebuild the same engine
+        self.spec = (patterns, hideout_maps, map_to_mode)
         self.hideout_maps = [m.lower() for m in hideout_maps]
-        self.process_names = process_names
-        self.resync_max_bytes = resync_max_bytes
-        self._stop_flag = False
         self.patterns: dict[str, re.Pattern] = {}
 
         # map_name -> MatchMode
@@ -45,7 +82,7 @@ class LogWatcher:
                 enum_key = str(mode_name).strip().upper()
                 self.map_to_mode[str(map_name).lower()] = MatchMode[enum_key]
             except KeyError:
-                logger.warning("Unknown mode '%s' for map '%s' in map_to_mode", mode_name, map_name)
+                self.problems.append(f"Unknown mode '{mode_name}' for map '{map_name}' in map_to_mode")
 
         for name, pattern_str in patterns.items():
             if name.startswith("_"):
@@ -53,10 +90,197 @@ class LogWatcher:
             try:
                 self.patterns[name] = re.compile(pattern_str, re.IGNORECASE)
             except re.error as e:
-                logger.warning("Invalid regex for '%s': %s - skipping", name, e)
+                self.problems.append(f"Invalid regex for '{name}': {e} - skipping")
+
+        registry = registry or metrics.REGISTRY
+        self.hits = {name: registry.counter(f"pattern.{name}") for name in self.patterns}
+        self.chain = [
+            (name, self.patterns[name], self.hits[name])
+            for name in CHAIN_ORDER
+            if name in self.patterns
+        ]
+
+
+# the live engine, the one a config reload is about to swap in, and a spare;
+# least recently used goes first
+ENGINE_CACHE_SIZE = 3
+_engine_cache: OrderedDict[tuple[str, metrics.Registry | None], PatternEngine] = OrderedDict()
+_engine_cache_lock = threading.Lock()
+
+
+def engine_key(patterns: dict[str, str], hideout_maps: list[str], map_to_mode: dict[str, str] | None) -> str:
+    blob = json.dumps([patterns, hideout_maps, map_to_mode or {}], sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def compile_engine(
+    patterns: dict[str, str],
+    hideout_maps: list[str],
+    map_to_mode: dict[str, str] | None = None,
+    strict: bool = False,
+    registry: metrics.Registry | None = None,
+) -> PatternEngine:
+    """Build a PatternEngine, reusing a recently built one for identical content.
+
+    Invalid entries are logged and skipped, or raise ValueError when strict.
+    Pattern hits are counted in registry (default: the app's).
+    """
+    key = (engine_key(patterns, hideout_maps, map_to_mode), registry)
+    with _engine_cache_lock:
+        engine = _engine_cache.get(key)
+        if engine is not None:
+            _engine_cache.move_to_end(key)
+    if engine is None:
+        engine = PatternEngine(patterns, hideout_maps, map_to_mode, registry)
+        with _engine_cache_lock:
+            _engine_cache[key] = engine
+            while len(_engine_cache) > ENGINE_CACHE_SIZE:
+                _engine_cache.popitem(last=False)
+        if not strict:
+            for problem in engine.problems:
+                logger.warning(problem)
+    if strict and engine.problems:
+        raise ValueError("; ".join(engine.problems))
+    return engine
+
+
+# ── event pipeline ───────────────────────────────────────────────────────────
+#
+#   lines  ->  iter_events()  ->  LogWatcher.apply_event()
+#
+# A line source yields (line_no, offset, text); iter_events classifies each
+# line once and yields a LogEvent for the ones that matter; the watcher folds
+# events into its GameState. The live tail, resyncs, replays and the tools
+# all run this same pass, and events can be batched, streamed or shipped
+# between processes (parallel_classify.py) as plain tuples.
+
+
+class Groups(tuple):
+    """Match groups, group(0) being the whole match, like re.Match.group."""
+
+    __slots__ = ()
+
+    def group(self, i: int = 0) -> str | None:
+        return self[i]
+
+
+class LogEvent(NamedTuple):
+    kind: str | None          # CHAIN_ORDER name; None = only carries the local account ID
+    groups: Groups
+    offset: int               # byte offset of the line, -1 if the source has none
+    timestamp: float | None   # the line's own timestamp, when a line_time was given
+    line_no: int              # -1 if the source has none
+    text: str
+
+
+def read_lines(path: str | Path, offset: int = 0, line_no: int = 0) -> Iterator[tuple[int, int, str]]:
+    """Line source for a file: (line_no, byte offset, text) of every non-empty line from offset."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            text = raw.decode("utf-8", errors="replace").strip()
+            if text:
+                yield line_no, offset, text
+            offset += len(raw)
+            line_no += 1
+
+
+def lines_from(texts: Iterable[str], line_no: int = 0) -> Iterator[tuple[int, int, str]]:
+    """Line source for lines already in memory (no byte offsets)."""
+    for text in texts:
+        text = text.strip()
+        if text:
+            yield line_no, -1, text
+        line_no += 1
+
+
+def iter_events(
+    lines: Iterable[tuple[int, int, str]],
+    engine: PatternEngine,
+    line_time: Callable[[str], float | None] | None = None,
+    account: bool = True,
+) -> Iterator[LogEvent]:
+    """Classify lines; yields one LogEvent per line that matches the chain.
+
+    While account is set, the first line carrying the local account ID is
+    yielded too even if nothing else matches it (kind None).
+    """
+    chain = engine.chain
+    account_pattern = engine.patterns.get("local_account_id") if account else None
+    for line_no, offset, text in lines:
+        kind = None
+        for name, pattern, hits in chain:
+            m = pattern.search(text)
+            if m is not None:
+                hits.inc()
+                kind, groups = name, Groups((m.group(0),) + m.groups())
+                break
+        if account_pattern is not None and account_pattern.search(text):
+            account_pattern = None  # the watcher reads the ID from this event's text
+            if kind is None:
+                groups = Groups()
+        elif kind is None:
+            continue
+        yield LogEvent(kind, groups, offset, line_time(text) if line_time else None, line_no, text)
+
+
+class LogWatcher:
+    def __init__(
+        self,
+        log_path: str | Path,
+        state: GameState,
+        patterns: dict[str, str],
+        hideout_maps: list[str],
+        process_names: list[str],
+        resync_max_bytes: int = 100 * 1024,
+        map_to_mode: dict[str, str] | None = None,
+        on_state_change: Callable[[GameSnapshot], None] | None = None,
+        tracer: tracing.Tracer | None = None,
+        clock: Clock | None = None,
+        engine: PatternEngine | None = None,
+        index_path: str | Path | None = None,
+        bus: events.EventBus | None = None,
+        liveness: Callable[[], bool] | None = None,
+        registry: metrics.Registry | None = None,
+    ):
+        self.log_path = Path(log_path)
+        # replaces the process probe when set (stations on other machines)
+        self.liveness = liveness
+        # sidecar line/event index (log_index.py); None = plain tail resync
+        self.index_path = Path(index_path) if index_path else None
+        self.state = state
+        self.clock = clock or state.clock
+        # a SimulatedClock follows the timestamps of the lines being replayed
+        self._line_time = getattr(self.clock, "line_time", None)
+        self.on_state_change = on_state_change
+        # only this watcher's thread writes self.state; other threads read
+        # self.snapshot, which is replaced whole after every batch
+        self._version = 0
+        self.snapshot: GameSnapshot = state.snapshot()
+        # typed transitions for subscribers; _announced is the last snapshot
+        # they were told about
+        self.bus = bus
+        self._announced: GameSnapshot | None = None
+        self.process_names = process_names
+        self.resync_max_bytes = resync_max_bytes
+        self._stop_flag = False
+
+        # offline users (replays, tools) pass metrics.OFFLINE to stay out of the app's numbers
+        self._metrics = registry or metrics.REGISTRY
+        self.engine = engine or compile_engine(patterns, hideout_maps, map_to_mode, registry=registry)
+        self._next_engine: PatternEngine | None = None
+
+        self._m_lines = self._metrics.meter("watcher.lines")
+        self._m_bytes = self._metrics.counter("watcher.bytes_tailed")
+        # classify + apply of one tailed batch, all of its lines (watcher.lines counts them)
+        self._m_batch_latency = self._metrics.histogram("watcher.process_batch_seconds")
+        self._m_probe = self._metrics.histogram("watcher.is_game_running_seconds")
 
+        self._tracer = tracer
         self._file_handle = None
         self._last_size = 0
+        self._last_mtime = 0.0
+        self._grew = False
         self._bot_init_count = 0
         self._hideout_loaded = False
         self._game_was_running = False
@@ -65,8 +289,33 @@ class LogWatcher:
         self._party_id: int | None = None
         self._party_members: set[int] = set()
 
+    @property
+    def patterns(self) -> dict[str, re.Pattern]:
+        return self.engine.patterns
+
+    @property
+    def hideout_maps(self) -> list[str]:
+        return self.engine.hideout_maps
+
+    @property
+    def map_to_mode(self) -> dict[str, MatchMode]:
+        return self.engine.map_to_mode
+
+    def swap_engine(self, engine: PatternEngine) -> None:
+        """Install a new engine. Takes effect with the next batch of lines."""
+        self._next_engine = engine
+
     def is_game_running(self) -> bool:
         """Check if Deadlock is running via tasklist (Windows) or pgrep (Linux/Mac)."""
+        t = time.perf_counter()
+        try:
+            if self.liveness is not None:
+                return self.liveness()
+            return self._probe_game_process()
+        finally:
+            self._m_probe.observe(time.perf_counter() - t)
+
+    def _probe_game_process(self) -> bool:
         if os.name != "nt":
             # On Linux, Deadlock runs through Proton, so the Windows .exe name still
             # appears in the process command line - pgrep -f catches it.
@@ -109,30 +358,80 @@ class LogWatcher:
         if not self.log_path.exists():
             return
 
+        t_start = time.perf_counter()
+        if self.index_path is not None:
+            try:
+                self._resync_indexed(t_start)
+                return
+            except Exception as e:
+                logger.warning("Indexed resync failed (%s), reading the tail instead", e)
         try:
             file_size = self.log_path.stat().st_size
             read_start = max(0, file_size - self.resync_max_bytes)
 
-            with open(self.log_path, "r", encoding="utf-8", errors="replace") as f:
-                if read_start > 0:
+            if read_start > 0:
+                with open(self.log_path, "rb") as f:
                     f.seek(read_start)
                     f.readline()
-                content = f.read()
-
-            lines = content.splitlines()
+                    read_start = f.tell()
+            # the window is bounded by resync_max_bytes, so holding it is fine
+            lines = list(read_lines(self.log_path, read_start))
             logger.info("Resyncing from %d lines (last %d KB)", len(lines), self.resync_max_bytes // 1024)
 
-            for line in lines:
-                line = line.strip()
-                if line:
-                    self._process_line(line)
+            for _ in self.fold(self.events(lines)):
+                pass
 
             self._last_size = file_size
+            self._metrics.counter("resync.lines").inc(len(lines))
+            self._metrics.histogram("resync.seconds").observe(time.perf_counter() - t_start)
             self._notify()
 
         except Exception as e:
             logger.error("Resync error: %s", e)
 
+    def _resync_indexed(self, t_start: float) -> None:
+        """Resync from the index: only classified lines are re-read.
+
+        Covers the same resync_max_bytes window as the plain resync, starting
+        later at the last app shutdown (which resets all state) if there is
+        one inside it. A log that isn't indexed yet is only indexed from that
+        window on. Lines no pattern matches can't change state, so they are
+        skipped outright; the local account ID is read off the first line that
+        carries it even when that line is before the start, so party tracking
+        still knows who we are.
+        """
+        from log_index import LogIndex
+
+        window_start = max(0, os.path.getsize(self.log_path) - self.resync_max_bytes)
+        index = LogIndex(self.log_path, self.engine, self.index_path)
+        index.update(start=window_start)
+        index.save()
+        file_size = index.size
+
+        start = index.line_at(window_start)
+        reset = index.last_event(RESET_KINDS)
+        if reset is not None and reset > start:
+            start = reset
+        if 0 <= index.account_line < start:
+            self._learn_account(index.line(index.account_line).strip())
+        numbers = [n for n, _ in index.events(start_line=start)]
+        logger.info("Resyncing from index: %d of %d lines (from L%d)",
+                    len(numbers), index.line_count - start, start)
+
+        indexed = ((n, index.offsets[n], line.strip()) for n, line in index.read_lines(numbers))
+        for _ in self.fold(self.events(indexed)):
+            pass
+
+        # a trailing line still being written isn't indexed yet
+        tail = os.path.getsize(self.log_path) - file_size
+        for _ in self.fold(self.events(read_lines(self.log_path, file_size, index.line_count))):
+            pass
+
+        self._last_size = file_size + max(0, tail)
+        self._metrics.counter("resync.lines").inc(len(numbers))
+        self._metrics.histogram("resync.seconds").observe(time.perf_counter() - t_start)
+        self._notify()
+
     def _open_log(self) -> bool:
         try:
             if self._file_handle:
@@ -158,7 +457,10 @@ class LogWatcher:
             stat = os.stat(self.log_path)
             if stat.st_size < self._last_size:
                 return True
+            self._grew = stat.st_size > self._last_size
+            self._m_bytes.inc(stat.st_size - self._last_size)
             self._last_size = stat.st_size
+            self._last_mtime = stat.st_mtime
             return False
         except OSError:
             return True
@@ -168,58 +470,86 @@ class LogWatcher:
         logger.info("Watching for %s ...", self.log_path)
 
         while not self._stop_flag:
-            game_running = self.is_game_running()
-
-            if game_running and not self._game_was_running:
-                logger.info("Deadlock detected!")
-                self._game_was_running = True
-                self.state.session_start_time = time.time()
-                self.state.enter_main_menu()
-                self._open_hero_window()
-                self._notify()
-
-                self.resync()
-                if not self._open_log():
-                    logger.warning(
-                        "console.log not found at %s - is Deadlock running with -condebug? "
-                        "Add -condebug to Steam launch options or restart Deadlock via this app.",
-                        self.log_path,
-                    )
-
-            elif not game_running and self._game_was_running:
-                logger.info("Deadlock closed.")
-                self._game_was_running = False
-                self._clear_party_tracking()
-                self._open_hero_window()
-                self.state.reset()
-                self._notify()
-                if self._file_handle:
-                    self._file_handle.close()
-                    self._file_handle = None
-                time.sleep(poll_interval * 3)
-                continue
-
-            elif not game_running:
-                time.sleep(poll_interval * 3)
-                continue
-
-            if self._file_handle is None or self._check_file_rotated():
-                if not self._open_log():
-                    time.sleep(poll_interval)
-                    continue
-                self.resync()
+            self.clock.sleep(self.step(poll_interval))
+
+    def step(self, poll_interval: float = 1.0) -> float:
+        """One pass of the watch loop. Returns how long to wait before the next.
+
+        start() calls this forever on its own thread; a host tracking many
+        logs (stations.py) interleaves the steps of all its watchers instead.
+        """
+        game_running = self.is_game_running()
+
+        if game_running and not self._game_was_running:
+            self._game_started()
+            self.resync()
+            if not self._open_log():
+                logger.warning(
+                    "console.log not found at %s - is Deadlock running with -condebug? "
+                    "Add -condebug to Steam launch options or restart Deadlock via this app.",
+                    self.log_path,
+                )
 
-            new_lines = self._file_handle.readlines()
-            if new_lines:
-                changed = False
-                for line in new_lines:
-                    line = line.strip()
-                    if line:
-                        changed |= self._process_line(line)
-                if changed:
-                    self._notify()
+        elif not game_running and self._game_was_running:
+            self._game_stopped()
+            return poll_interval * 3
+
+        elif not game_running:
+            return poll_interval * 3
+
+        if self._file_handle is None or self._check_file_rotated():
+            if not self._open_log():
+                return poll_interval
+            self.resync()
+
+        batch = None
+        if self._tracer is not None and self._grew:
+            batch = self._tracer.begin_batch(self._last_mtime)
+        self._process_batch(self._file_handle.readlines(), batch)
+        return poll_interval
+
+    def _game_started(self) -> None:
+        logger.info("Deadlock detected!")
+        self._game_was_running = True
+        self.state.session_start_time = self.clock.time()
+        self.state.enter_main_menu()
+        self._open_hero_window()
+        self._notify()
+
+    def _game_stopped(self) -> None:
+        logger.info("Deadlock closed.")
+        self._game_was_running = False
+        self._clear_party_tracking()
+        self._open_hero_window()
+        self.state.reset()
+        self._notify()
+        if self._file_handle:
+            self._file_handle.close()
+            self._file_handle = None
 
-            time.sleep(poll_interval)
+    def _process_batch(self, new_lines: list[str], batch: tracing.Batch | None = None) -> None:
+        """Classify and apply a batch of raw lines, then publish once."""
+        if not new_lines:
+            return
+        self._m_lines.mark(len(new_lines))
+        if batch is not None:
+            batch.mark("read")
+        changed = False
+        t = time.perf_counter()
+        for event in self.events(lines_from(new_lines)):
+            if batch is not None:
+                classified_at = tracing.now_us()
+            line_changed = self.apply_event(event)
+            if line_changed and batch is not None:
+                batch.transition(event.kind, classified_at, self.state.phase.name)
+            changed |= line_changed
+        self._m_batch_latency.observe(time.perf_counter() - t)
+        if changed:
+            self._notify(batch)
+        else:
+            # map, player count, match start... aren't transitions of the
+            # state machine, but the sinks still have to hear about them
+            self._announce(self._publish())
 
     def _apply_map(self, map_name: str) -> None:
         """Apply map-derived phase/mode updates from any map signal."""
@@ -332,7 +662,24 @@ class LogWatcher:
         elif "disband" in event_key:
             self._clear_party_tracking()
 
-    def _process_line(self, line: str) -> bool:
+    def events(self, lines: Iterable[tuple[int, int, str]]) -> Iterator[LogEvent]:
+        """iter_events with this watcher's engine and clock."""
+        if self._next_engine is not None:
+            self.engine, self._next_engine = self._next_engine, None
+        return iter_events(lines, self.engine, self._line_time, account=self._local_account_id is None)
+
+    def apply_event(self, event: LogEvent) -> bool:
+        """Fold one event into the state. Returns True if anything visible changed."""
+        if event.timestamp is not None:
+            self.clock.advance_to(event.timestamp)
+        return self._apply(event.kind, event.groups, event.text)
+
+    def fold(self, events: Iterable[LogEvent]) -> Iterator[tuple[LogEvent, bool]]:
+        """apply_event over a stream: (event, changed) for each."""
+        for event in events:
+            yield event, self.apply_event(event)
+
+    def _apply(self, kind: str | None, m: Groups | None, line: str) -> bool:
         old_phase = self.state.phase
         old_hero = self.state.hero_key
         old_mode = self.state.match_mode
@@ -346,39 +693,39 @@ class LogWatcher:
         # [U:1:XXXXX] appears in many log lines that also carry other
         # patterns (server_connect, player_info, etc.)
         if self._local_account_id is None:
-            if m := self._match("local_account_id", line):
-                self._local_account_id = int(m.group(1))
+            if acct := self._match("local_account_id", line):
+                self._local_account_id = int(acct.group(1))
                 if self._party_id is not None:
                     self._party_members.add(self._local_account_id)
                     self._set_party_size_from_members(minimum_size=2)
 
         # Map signals
-        if m := self._match("party_event", line):
+        if kind == "party_event":
             self._apply_party_event(
                 party_id=int(m.group(1)),
                 event_name=m.group(2),
                 account_id=int(m.group(3)),
             )
 
-        elif m := self._match("map_info", line):
+        elif kind == "map_info":
             self._apply_map(m.group(1))
 
-        elif m := self._match("map_created_physics", line):
+        elif kind == "map_created_physics":
             self._apply_map(m.group(1))
 
         # Matchmaking start
-        elif self._match("mm_start", line):
+        elif kind == "mm_start":
             if self.state.phase in (GamePhase.HIDEOUT, GamePhase.PARTY_HIDEOUT, GamePhase.MAIN_MENU):
                 self.state.enter_queue()
 
         # Matchmaking stop
-        elif self._match("mm_stop", line):
+        elif kind == "mm_stop":
             if self.state.phase == GamePhase.IN_QUEUE:
                 self.state.leave_queue()
 
         # Lobby created = match found, start the match timer
-        elif self._match("lobby_created", line):
-            self.state.match_start_time = time.time()
+        elif kind == "lobby_created":
+            self.state.match_start_time = self.clock.time()
             self.state.queue_start_time = None
             self._prepare_match_hero_tracking()
             if self.state.phase in (
@@ -390,16 +737,16 @@ class LogWatcher:
                 self.state.enter_match_intro()
 
         # Lobby destroyed = match is over
-        elif self._match("lobby_destroyed", line):
+        elif kind == "lobby_destroyed":
             self.state.end_match()
 
         # Spectating = "Playing Broadcast" in HostStateManager
-        elif self._match("spectate_broadcast", line):
+        elif kind == "spectate_broadcast":
             self.state.enter_spectating()
             self._hideout_loaded = False
 
         # If we connect to a real server while queued, stop queue timer
-        elif m := self._match("server_connect", line):
+        elif kind == "server_connect":
             addr = m.group(1)
             self.state.connect_to_server(addr)
             is_real_server = "loopback" not in addr.lower()
@@ -420,28 +767,28 @@ class LogWatcher:
                 self.state.queue_start_time = None
 
         # Hero loading = local server (skip during spectating / initial hideout load)
-        elif m := self._match("loaded_hero", line):
+        elif kind == "loaded_hero":
             is_hideout = self.state.phase in (GamePhase.HIDEOUT, GamePhase.PARTY_HIDEOUT)
             if not (is_hideout and not self._hideout_loaded):
                 self._apply_hero_signal(m.group(1))
 
         # Hero loading via VMDL (remote matches only, not hideout)
         # Also handles Silver's wolf form swap
-        elif m := self._match("client_hero_vmdl", line):
+        elif kind == "client_hero_vmdl":
             hero_norm = m.group(1).lower()
             self._apply_hero_signal(hero_norm)
             if self.state.hero_key == "werewolf" and hero_norm == "werewolf":
                 self.state.is_transformed = "werewolf_transform" in line.lower()
 
         # Silver wolf form from nonVMDL sources
-        elif self._match("silver_wolf_form_on", line):
+        elif kind == "silver_wolf_form_on":
             self.state.is_transformed = True
 
-        elif self._match("silver_wolf_form_off", line):
+        elif kind == "silver_wolf_form_off":
             self.state.is_transformed = False
 
         # Disconnect = stay in POST_MATCH while loading back to hideout
-        elif m := self._match("server_disconnect", line):
+        elif kind == "server_disconnect":
             reason = m.group(1)
             if "EXITING" in reason.upper():
                 self._open_hero_window()
@@ -451,11 +798,11 @@ class LogWatcher:
             elif self.state.phase in (GamePhase.IN_MATCH, GamePhase.MATCH_INTRO, GamePhase.SPECTATING):
                 self.state.end_match()
 
-        elif self._match("loop_mode_menu", line):
+        elif kind == "loop_mode_menu":
             if self.state.phase in (GamePhase.IN_MATCH, GamePhase.MATCH_INTRO, GamePhase.SPECTATING):
                 self.state.end_match()
 
-        elif m := self._match("change_game_state", line):
+        elif kind == "change_game_state":
             if self.state.phase != GamePhase.SPECTATING and not in_hideout_map:
                 state_name = m.group(1).lower()
                 state_id = int(m.group(2))
@@ -470,7 +817,7 @@ class LogWatcher:
                         self.state.end_match()
 
         # Hideout lobby state
-        elif m := self._match("hideout_lobby_state", line):
+        elif kind == "hideout_lobby_state":
             lobby_id = int(m.group(2))
             if lobby_id == 0:
                 self._clear_party_tracking()
@@ -484,7 +831,7 @@ class LogWatcher:
         # Bot mode — only classify as BOT_MATCH if we haven't already
         # identified the mode from player count (standard/street brawl
         # matches also have bots for lane creeps, jungle camps, etc.)
-        elif m := self._match("bot_init", line):
+        elif kind == "bot_init":
             if self.state.phase != GamePhase.SPECTATING and not in_hideout_map:
                 difficulty = m.group(1).replace("k_ECitadelBotDifficulty_", "")
                 self._bot_init_count += 1
@@ -493,13 +840,13 @@ class LogWatcher:
                     self.state.match_mode = MatchMode.BOT_MATCH
 
         # Host activate (map fully loaded)
-        elif m := self._match("host_activate", line):
+        elif kind == "host_activate":
             map_name = m.group(1).lower().strip()
             if map_name in self.hideout_maps:
                 self._hideout_loaded = True
 
         # Server shutdown
-        elif m := self._match("server_shutdown", line):
+        elif kind == "server_shutdown":
             reason = m.group(1)
             if "EXITING" in reason.upper():
                 self._clear_party_tracking()
@@ -507,15 +854,19 @@ class LogWatcher:
                 self.state.reset()
 
         # App shutdown
-        elif self._match("app_shutdown", line) or self._match("source2_shutdown", line):
+        elif kind in ("app_shutdown", "source2_shutdown"):
+            # a fresh start: nothing before this line may matter afterwards,
+            # so an indexed resync can begin here (RESET_KINDS)
             self._clear_party_tracking()
             self._open_hero_window()
+            self._hideout_loaded = False
+            self._bot_init_count = 0
             self.state.reset()
 
         # Player info also get match mode from player count
         # Standard 6v6: 12 online 6 coop bots
         # Street Brawl 4v4: 8 online 4 coop bots
-        elif m := self._match("player_info", line):
+        elif kind == "player_info":
             if self.state.phase != GamePhase.SPECTATING:
                 self.state.player_count = int(m.group(1))
                 self.state.bot_count = int(m.group(2))
@@ -528,7 +879,7 @@ class LogWatcher:
                         self.state.match_mode = MatchMode.STREET_BRAWL
 
         # (>0 means real match loading)
-        elif m := self._match("precaching_heroes", line):
+        elif kind == "precaching_heroes":
             count = int(m.group(1))
             if count > 0:
                 self._hideout_loaded = False
@@ -541,19 +892,54 @@ class LogWatcher:
             or self.state.party_size != old_party_size
         )
 
+    def _learn_account(self, line: str) -> None:
+        """Take the local account ID from a line without applying anything else on it."""
+        if self._local_account_id is None:
+            if acct := self._match("local_account_id", line):
+                self._local_account_id = int(acct.group(1))
+
     def _match(self, pattern_name: str, line: str) -> re.Match | None:
-        pattern = self.patterns.get(pattern_name)
+        engine = self.engine
+        pattern = engine.patterns.get(pattern_name)
         if pattern is None:
             return None
-        return pattern.search(line)
-
-    def _notify(self) -> None:
-        self.state.last_update = time.time()
+        m = pattern.search(line)
+        if m is not None:
+            engine.hits[pattern_name].inc()
+        return m
+
+    def _publish(self) -> GameSnapshot:
+        self._version += 1
+        self.snapshot = snapshot = self.state.snapshot(self._version)
+        return snapshot
+
+    def _announce(self, snapshot: GameSnapshot, batch: tracing.Batch | None = None) -> bool:
+        """Put a Transition on the bus if anything in events.KINDS moved."""
+        if self.bus is None:
+            return False
+        changes = events.diff(self._announced, snapshot)
+        if not changes:
+            return False
+        self._announced = snapshot
+        # the batch travels with the event; its consumer finishes it
+        self.bus.publish(events.Transition(snapshot, changes, batch))
+        return True
+
+    def _notify(self, batch: tracing.Batch | None = None) -> None:
+        self.state.last_update = self.clock.time()
+        snapshot = self._publish()
+        handed_off = self._announce(snapshot, batch)
+        if self._tracer is not None:
+            self._tracer.set_current(batch)
         if self.on_state_change:
             try:
-                self.on_state_change(self.state)
+                self.on_state_change(snapshot)
             except Exception as e:
                 logger.error("Callback error: %s", e)
+        if batch is not None:
+            self._tracer.set_current(None)
+            if not handed_off:
+                self._tracer.finish_batch(batch)
 
     def stop(self) -> None:
         self._stop_flag = True
@@ -0,0 +1,198 @@
+"""
+Differential replay: run a reference and a candidate engine over the same logs
+and report the first transition where they disagree.
+
+An engine is a source directory (anything containing game_state.py and
+console_log.py, e.g. a `git worktree` of the last release) plus a config.json.
+Each engine replays in its own isolated subprocess (python -I, sys.path holding
+only its source directory and the stdlib/site-packages) so two versions of the
+same modules never share an interpreter and a module missing from the
+reference can't be picked up from the candidate tree; both run side by side.
+
+    python parser.py <log|dir|glob> --diff --ref-src /tmp/release/src --cand-config new.json
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# fields compared per transition
+FIELDS = ("phase", "hero", "mode", "map", "party_size", "transformed")
+CONTEXT_LINES = 5
+
+# run with `python -I -c`: no script dir, cwd or PYTHONPATH on sys.path, so the
+# engine's own directory goes first and this file is loaded by path only
+_BOOTSTRAP = """
+import runpy, sys
+script, src_dir = sys.argv[1:3]
+sys.path.insert(0, src_dir)
+runpy.run_path(script, run_name="__engine_worker__")["_worker"](src_dir, sys.argv[3], sys.argv[4:])
+"""
+
+
+class _Counted:
+    """Iterates a file while counting its lines."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def __iter__(self):
+        for line in self.f:
+            self.count += 1
+            yield line
+
+
+def _engine_module(name: str, src_dir: str):
+    """Import name, insisting it comes from src_dir."""
+    import importlib
+
+    try:
+        module = importlib.import_module(name)
+    except ImportError as e:
+        raise SystemExit(f"engine {src_dir}: cannot import {name}: {e}")
+    if Path(module.__file__).resolve().parent != Path(src_dir).resolve():
+        raise SystemExit(f"engine {src_dir}: {name} resolved to {module.__file__}")
+    return module
+
+
+def _worker(src_dir: str, config_path: str, logs: list[str]) -> None:
+    """Subprocess entry: replay logs with the engine in src_dir, print JSONL."""
+    import time
+
+    import inspect
+
+    GameState = _engine_module("game_state", src_dir).GameState
+    console_log = _engine_module("console_log", src_dir)
+    LogWatcher = console_log.LogWatcher
+    # engines that have an offline metrics registry get it
+    extra = {}
+    if "registry" in inspect.signature(LogWatcher).parameters:
+        extra["registry"] = _engine_module("metrics", src_dir).OFFLINE
+
+    with open(config_path) as f:
+        config = json.load(f)
+
+    out = sys.stdout
+    total_lines = 0
+    busy = 0.0
+    for log in logs:
+        state = GameState()
+        state.enter_main_menu()
+        watcher = LogWatcher(
+            log_path=log, state=state,
+            patterns=config.get("log_patterns", {}),
+            map_to_mode=config.get("map_to_mode", {}),
+            hideout_maps=config.get("hideout_maps", ["dl_hideout"]),
+            process_names=[],
+            **extra,
+        )
+        changed_at = []
+        t = time.perf_counter()
+        # streamed line by line, same numbering as _context()
+        with open(log, "r", encoding="utf-8", errors="replace") as f:
+            lines = _Counted(f)
+            if hasattr(watcher, "events"):
+                changes = (e.line_no for e, changed in watcher.fold(watcher.events(console_log.lines_from(lines))) if changed)
+            else:
+                # engines from before the event pipeline
+                changes = (i for i, line in enumerate(lines) if line.strip() and watcher._process_line(line.strip()))
+            for i in changes:
+                changed_at.append((i, (
+                    state.phase.name, state.hero_key, state.match_mode.name,
+                    state.map_name, state.party_size, state.is_transformed,
+                )))
+        busy += time.perf_counter() - t
+        total_lines += lines.count
+
+        for i, values in changed_at:
+            out.write(json.dumps({"file": log, "line": i, **dict(zip(FIELDS, values))}) + "\n")
+
+    out.write(json.dumps({"_stats": {"lines": total_lines, "seconds": busy}}) + "\n")
+
+
+def run_engine(src_dir: str | Path, config_path: str | Path, logs: list[Path]) -> tuple[dict[str, list[dict]], dict]:
+    proc = subprocess.run(
+        [sys.executable, "-I", "-c", _BOOTSTRAP, str(Path(__file__).resolve()), str(src_dir),
+         str(config_path), *map(str, logs)],
+        capture_output=True, text=True, encoding="utf-8",
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"engine {src_dir} failed:\n{proc.stderr[-2000:]}")
+
+    timelines: dict[str, list[dict]] = {str(log): [] for log in logs}
+    stats: dict = {}
+    for raw in proc.stdout.splitlines():
+        rec = json.loads(raw)
+        if "_stats" in rec:
+            stats = rec["_stats"]
+        else:
+            timelines[rec["file"]].append(rec)
+    return timelines, stats
+
+
+def _context(log: str, line_no: int) -> list[tuple[int, str]]:
+    start = max(0, line_no - CONTEXT_LINES)
+    with open(log, "r", encoding="utf-8", errors="replace") as f:
+        window = itertools.islice(f, start, line_no + CONTEXT_LINES + 1)
+        return [(start + i, text.rstrip("\n")) for i, text in enumerate(window)]
+
+
+def first_divergence(ref: list[dict], cand: list[dict]) -> tuple[dict | None, dict | None] | None:
+    """First pair of transitions that differ in line or any compared field."""
+    for r, c in itertools.zip_longest(ref, cand):
+        if r is None or c is None:
+            return r, c
+        if r["line"] != c["line"] or any(r.get(k) != c.get(k) for k in FIELDS):
+            return r, c
+    return None
+
+
+def _fmt(rec: dict | None) -> str:
+    if rec is None:
+        return "(no transition)"
+    return f"L{rec['line']} " + " ".join(f"{k}={rec.get(k)}" for k in FIELDS)
+
+
+def diff(logs: list[Path], ref_src: Path, ref_config: Path, cand_src: Path, cand_config: Path) -> bool:
+    """Print the comparison; returns True when the engines agree on every log."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ref_job = pool.submit(run_engine, ref_src, ref_config, logs)
+        cand_job = pool.submit(run_engine, cand_src, cand_config, logs)
+        (ref, ref_stats), (cand, cand_stats) = ref_job.result(), cand_job.result()
+
+    agree = True
+    for log in map(str, logs):
+        result = first_divergence(ref[log], cand[log])
+        if result is None:
+            continue
+        agree = False
+        r, c = result
+        line_no = min(x["line"] for x in (r, c) if x is not None)
+        print(f"✗ {log}: engines diverge at line {line_no}")
+        print(f"    reference: {_fmt(r)}")
+        print(f"    candidate: {_fmt(c)}")
+        for i, text in _context(log, line_no):
+            marker = ">>" if i == line_no else "  "
+            print(f"    {marker} L{i:>6}: {text[:160]}")
+        print()
+
+    if agree:
+        transitions = sum(len(t) for t in ref.values())
+        print(f"✓ {len(logs)} logs, {transitions} transitions, no divergence")
+
+    print("\nThroughput:")
+    for name, stats in (("reference", ref_stats), ("candidate", cand_stats)):
+        secs = stats.get("seconds") or 0.0
+        lines = stats.get("lines", 0)
+        rate = lines / secs if secs else float("inf")
+        print(f"  {name:<10} {lines:>10} lines  {secs:8.3f}s  {rate:>12,.0f} lines/s")
+    if ref_stats.get("seconds") and cand_stats.get("seconds"):
+        print(f"  candidate is {ref_stats['seconds'] / cand_stats['seconds']:.2f}x the reference")
+    return agree
+
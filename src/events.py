@@ -0,0 +1,163 @@
+"""
+In-process state-change bus.
+
+LogWatcher publishes a Transition whenever a batch changes something a
+consumer can see (phase, hero, mode, party, transform, map, player count,
+match/queue/session start). Every subscriber has its own small queue that
+drops the oldest event when full, so a slow consumer (Discord IPC stuck on
+a dead pipe, say) loses stale transitions instead of stalling the watcher
+or anyone else. Consumers block on their queue and wake only when something
+changed.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+import metrics
+
+if TYPE_CHECKING:
+    from game_state import GameSnapshot
+    from tracing import Batch
+
+logger = logging.getLogger(__name__)
+
+# transition kind -> GameSnapshot field; every field build_payload reads
+# (bar last_update) so no sink is left showing a stale value
+KINDS = {
+    "phase": "phase",
+    "hero": "hero_key",
+    "mode": "match_mode",
+    "party": "party_size",
+    "transform": "is_transformed",
+    "map": "map_name",
+    "players": "player_count",
+    "bots": "bot_difficulty",
+    "match_start": "match_start_time",
+    "queue_start": "queue_start_time",
+    "session_start": "session_start_time",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    kind: str
+    old: object
+    new: object
+
+
+@dataclass(frozen=True, slots=True)
+class Transition:
+    snapshot: GameSnapshot
+    changes: tuple[Change, ...]
+    # trace of the watcher batch that caused it (None unless tracing);
+    # the subscriber that talks to Discord stamps and finishes it
+    batch: Batch | None = None
+
+    @property
+    def kinds(self) -> frozenset[str]:
+        return frozenset(c.kind for c in self.changes)
+
+
+def diff(old: GameSnapshot | None, new: GameSnapshot) -> tuple[Change, ...]:
+    """Changes from old to new; everything counts as changed when there is no old."""
+    changes = []
+    for kind, name in KINDS.items():
+        before = getattr(old, name) if old is not None else None
+        after = getattr(new, name)
+        if old is None or before != after:
+            changes.append(Change(kind, before, after))
+    return tuple(changes)
+
+
+class Subscription:
+    def __init__(self, name: str, maxsize: int, kinds: frozenset[str] | None,
+                 on_drop: Callable[[Transition], None] | None = None):
+        self.name = name
+        self.kinds = kinds
+        # told about every event pushed out by a newer one (tracing finishes its batch)
+        self.on_drop = on_drop
+        self._events: deque[Transition] = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._m_dropped = metrics.counter(f"bus.{name}.dropped")
+
+    def put(self, event: Transition) -> None:
+        dropped = None
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self._m_dropped.inc()
+                dropped = self._events.popleft()
+            self._events.append(event)
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout: float | None = None) -> Transition | None:
+        """Next event, or None on timeout / close."""
+        with self._cond:
+            if not self._events and not self._closed:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._subs: tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, maxsize: int = 16, kinds: set[str] | None = None,
+                  on_drop: Callable[[Transition], None] | None = None) -> Subscription:
+        sub = Subscription(name, maxsize, frozenset(kinds) if kinds else None, on_drop)
+        with self._lock:
+            self._subs = self._subs + (sub,)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+        sub.close()
+
+    def publish(self, event: Transition) -> None:
+        kinds = event.kinds
+        for sub in self._subs:  # tuple swap on subscribe, so no lock here
+            if sub.kinds is None or sub.kinds & kinds:
+                sub.put(event)
+
+    def close(self) -> None:
+        with self._lock:
+            subs, self._subs = self._subs, ()
+        for sub in subs:
+            sub.close()
+
+    def run(self, name: str, handler: Callable[[Transition], None], maxsize: int = 16,
+            kinds: set[str] | None = None, on_drop: Callable[[Transition], None] | None = None) -> threading.Thread:
+        """Subscribe and call handler for each event on a daemon thread of its own."""
+        sub = self.subscribe(name, maxsize, kinds, on_drop)
+
+        def loop() -> None:
+            while not sub.closed:
+                event = sub.get()
+                if event is None:
+                    continue
+                try:
+                    handler(event)
+                except Exception as e:
+                    logger.error("%s subscriber error: %s", name, e)
+
+        thread = threading.Thread(target=loop, daemon=True, name=f"bus-{name}")
+        thread.start()
+        return thread
@@ -5,11 +5,12 @@ See hero_data.py for caching and fallback logic.
 
 from __future__ import annotations
 
-import time
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import TYPE_CHECKING
 
+from clock import SYSTEM_CLOCK, Clock
+
 if TYPE_CHECKING:
     from hero_data import HeroDataStore
 
@@ -76,24 +77,10 @@ MODE_DISPLAY: dict[MatchMode, str] = {
 # See hero_data.py — HeroDataStore provides display_name(), asset_key(), hideout_text().
 
 
-@dataclass
-class GameState:
-    phase: GamePhase = GamePhase.NOT_RUNNING
-    match_mode: MatchMode = MatchMode.UNKNOWN
-    hero_key: str | None = None  # internal codename
-    is_transformed: bool = False
-    party_size: int = 1  # 1 = solo
-    server_address: str | None = None  # ip:port from console
-    map_name: str | None = None
-    is_loopback: bool = False  # hideout
-    match_start_time: float | None = None  # epoch when match began
-    queue_start_time: float | None = None  # epoch when queue began
-    session_start_time: float | None = None  # epoch when game was detected
-    last_update: float = field(default_factory=time.time)
-    game_state_id: int | None = None  # from ChangeGameState
-    player_count: int = 0
-    bot_count: int = 0
-    bot_difficulty: str | None = None
+class _StateView:
+    """Derived, read-only properties shared by GameState and GameSnapshot."""
+
+    __slots__ = ()
 
     @property
     def hero_display_name(self) -> str | None:
@@ -138,6 +125,40 @@ class GameState:
     def mode_display(self) -> str:
         return MODE_DISPLAY.get(self.match_mode, "Match")
 
+
+@dataclass
+class GameState(_StateView):
+    phase: GamePhase = GamePhase.NOT_RUNNING
+    match_mode: MatchMode = MatchMode.UNKNOWN
+    hero_key: str | None = None  # internal codename
+    is_transformed: bool = False
+    party_size: int = 1  # 1 = solo
+    server_address: str | None = None  # ip:port from console
+    map_name: str | None = None
+    is_loopback: bool = False  # hideout
+    match_start_time: float | None = None  # epoch when match began
+    queue_start_time: float | None = None  # epoch when queue began
+    session_start_time: float | None = None  # epoch when game was detected
+    last_update: float = 0.0  # defaults to clock.time() at creation
+    game_state_id: int | None = None  # from ChangeGameState
+    player_count: int = 0
+    bot_count: int = 0
+    bot_difficulty: str | None = None
+    clock: Clock = field(default=SYSTEM_CLOCK, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.last_update:
+            self.last_update = self.clock.time()
+
+    def snapshot(self, version: int = 0) -> GameSnapshot:
+        """Frozen copy of the current state, safe to hand to other threads."""
+        return GameSnapshot(
+            self.phase, self.match_mode, self.hero_key, self.is_transformed, self.party_size,
+            self.server_address, self.map_name, self.is_loopback, self.match_start_time,
+            self.queue_start_time, self.session_start_time, self.last_update, self.game_state_id,
+            self.player_count, self.bot_count, self.bot_difficulty, self.clock, version,
+        )
+
     def enter_main_menu(self) -> None:
         self.phase = GamePhase.MAIN_MENU
         self._clear_match()
@@ -149,7 +170,7 @@ class GameState:
 
     def enter_queue(self) -> None:
         self.phase = GamePhase.IN_QUEUE
-        self.queue_start_time = time.time()
+        self.queue_start_time = self.clock.time()
 
     def leave_queue(self) -> None:
         self.queue_start_time = None
@@ -171,7 +192,7 @@ class GameState:
         if mode != MatchMode.UNKNOWN:
             self.match_mode = mode
         if self.match_start_time is None:
-            self.match_start_time = time.time()
+            self.match_start_time = self.clock.time()
         self.queue_start_time = None
         self.game_state_id = 5
 
@@ -232,4 +253,34 @@ class GameState:
         self.queue_start_time = None
         self.session_start_time = None
         self.is_loopback = False
-        self.player_count = 0
\ No newline at end of file
+        self.player_count = 0
+
+
+@dataclass(frozen=True, slots=True)
+class GameSnapshot(_StateView):
+    """Immutable GameState as of one watcher batch.
+
+    The watcher thread is the only writer of GameState; it publishes one of
+    these after each batch by swapping a single reference, so readers (RPC
+    refresh, tray) never lock and never see a half-applied transition.
+    version increases with every publish.
+    """
+
+    phase: GamePhase = GamePhase.NOT_RUNNING
+    match_mode: MatchMode = MatchMode.UNKNOWN
+    hero_key: str | None = None
+    is_transformed: bool = False
+    party_size: int = 1
+    server_address: str | None = None
+    map_name: str | None = None
+    is_loopback: bool = False
+    match_start_time: float | None = None
+    queue_start_time: float | None = None
+    session_start_time: float | None = None
+    last_update: float = 0.0
+    game_state_id: int | None = None
+    player_count: int = 0
+    bot_count: int = 0
+    bot_difficulty: str | None = None
+    clock: Clock = field(default=SYSTEM_CLOCK, repr=False, compare=False)
+    version: int = 0
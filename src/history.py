@@ -0,0 +1,204 @@
+"""
+Local match history in SQLite.
+
+MatchRecorder watches published state snapshots (on the watcher thread) and
+turns them into session and match rows: a match opens when the phase enters
+MATCH_INTRO / IN_MATCH and closes when it leaves them, a session spans the
+time the game is running. The recorder only queues rows; MatchHistory's
+writer thread commits them in batches, so the watcher never waits on disk.
+
+Queries (matches today, time on a hero) run on their own connection against
+indexes on start time, hero and mode, cheap enough to run per presence update.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+from game_state import GamePhase, GameSnapshot
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX = 100
+FLUSH_INTERVAL = 2.0
+
+MATCH_PHASES = (GamePhase.MATCH_INTRO, GamePhase.IN_MATCH)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    start       REAL PRIMARY KEY,
+    end         REAL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id              INTEGER PRIMARY KEY,
+    session_start   REAL,
+    start           REAL NOT NULL,
+    end             REAL NOT NULL,
+    duration        REAL NOT NULL,
+    hero            TEXT,
+    mode            TEXT NOT NULL,
+    map             TEXT,
+    party_size      INTEGER NOT NULL,
+    bot_difficulty  TEXT
+);
+CREATE INDEX IF NOT EXISTS matches_start ON matches(start);
+CREATE INDEX IF NOT EXISTS matches_hero ON matches(hero, start);
+CREATE INDEX IF NOT EXISTS matches_mode ON matches(mode, start);
+"""
+
+_STOP = object()
+
+
+class MatchHistory:
+    def __init__(self, db_path: str | Path, flush_interval: float = FLUSH_INTERVAL):
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # the connection's context manager only commits; closing() closes it
+        with closing(sqlite3.connect(self.db_path)) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+        # readers share one connection; the writer thread has its own
+        self._read = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True, name="history-writer")
+        self._writer.start()
+
+    # -- writes (any thread) -----------------------------------------------------
+
+    def add_match(self, row: dict) -> None:
+        self._queue.put((
+            "INSERT INTO matches (session_start, start, end, duration, hero, mode, map, party_size, bot_difficulty)"
+            " VALUES (:session_start, :start, :end, :duration, :hero, :mode, :map, :party_size, :bot_difficulty)",
+            row,
+        ))
+
+    def set_session(self, start: float, end: float | None = None) -> None:
+        self._queue.put((
+            "INSERT INTO sessions (start, end) VALUES (?, ?) ON CONFLICT(start) DO UPDATE SET end = excluded.end",
+            (start, end),
+        ))
+
+    def _write_loop(self) -> None:
+        db = sqlite3.connect(self.db_path)
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < BATCH_MAX and batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                batch.pop()
+                stop = True
+            try:
+                with db:
+                    for sql, params in batch:
+                        db.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error("History write failed (%d rows dropped): %s", len(batch), e)
+        db.close()
+
+    def close(self) -> None:
+        """Flush queued rows and stop the writer."""
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._read.close()
+
+    # -- queries ---------------------------------------------------------------
+
+    def _scalar(self, sql: str, params: tuple) -> float:
+        with self._read_lock:
+            row = self._read.execute(sql, params).fetchone()
+        return row[0] or 0
+
+    def matches_since(self, since: float) -> int:
+        return int(self._scalar("SELECT COUNT(*) FROM matches WHERE start >= ?", (since,)))
+
+    def hero_seconds(self, hero: str, since: float = 0.0) -> float:
+        return self._scalar("SELECT SUM(duration) FROM matches WHERE hero = ? AND start >= ?", (hero, since))
+
+    def mode_counts(self, since: float = 0.0) -> dict[str, int]:
+        with self._read_lock:
+            rows = self._read.execute(
+                "SELECT mode, COUNT(*) FROM matches WHERE start >= ? GROUP BY mode", (since,)
+            ).fetchall()
+        return dict(rows)
+
+
+def start_of_day(ts: float) -> float:
+    """Local midnight before ts."""
+    return datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def ordinal(n: int) -> str:
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+class MatchRecorder:
+    """Turns state transitions into history rows. Call observe() on every change."""
+
+    def __init__(self, history: MatchHistory):
+        self.history = history
+        self._session: float | None = None
+        self._match: dict | None = None
+
+    def observe(self, state: GameSnapshot) -> None:
+        now = state.clock.time()
+        running = state.phase != GamePhase.NOT_RUNNING
+        in_match = state.phase in MATCH_PHASES
+
+        if running and self._session is None:
+            self._session = state.session_start_time or now
+            self.history.set_session(self._session)
+
+        if in_match:
+            if self._match is None:
+                self._match = {"session_start": self._session, "start": state.match_start_time or now,
+                               "hero": None, "map": None, "bot_difficulty": None}
+            m = self._match
+            m["hero"] = state.hero_key or m["hero"]
+            m["map"] = state.map_name or m["map"]
+            m["mode"] = state.match_mode.name
+            m["party_size"] = state.party_size
+            m["bot_difficulty"] = state.bot_difficulty or m["bot_difficulty"]
+        elif self._match is not None:
+            self._close_match(now)
+
+        if not running and self._session is not None:
+            self.history.set_session(self._session, now)
+            self._session = None
+
+    def _close_match(self, now: float) -> None:
+        m, self._match = self._match, None
+        m["end"] = now
+        m["duration"] = max(0.0, now - m["start"])
+        self.history.add_match(m)
+
+    def current_match_start(self) -> float | None:
+        return self._match["start"] if self._match else None
+
+    def close(self, now: float) -> None:
+        """App is stopping: close whatever is open."""
+        if self._match is not None:
+            self._close_match(now)
+        if self._session is not None:
+            self.history.set_session(self._session, now)
+            self._session = None
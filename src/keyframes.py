@@ -0,0 +1,149 @@
+"""
+Replay keyframes: the full watcher state every N MB of a log, by byte offset.
+
+A keyframe is GameState plus the LogWatcher internals the next lines depend
+on (party tracking, account ID, hideout / hero-window flags) and the replay
+clock, captured just before the line at its offset. Replaying from offset X
+restores the last keyframe at or before X and only folds the lines between
+it and X, instead of everything from line 0.
+
+Keyframes live next to the log in <log>.kf: a JSON header line (layout
+version, pattern engine, a digest of the log's first bytes) then one JSON
+object per keyframe. A file whose header doesn't match the log or the
+patterns is ignored and rewritten by the next full replay.
+
+    frames = Keyframes.load(log_path, engine)
+    frame = frames.before(offset)        # None -> start from 0
+    frame.restore(watcher)
+"""
+
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from game_state import GamePhase, GameState, MatchMode
+
+if TYPE_CHECKING:
+    from console_log import LogWatcher, PatternEngine
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+INTERVAL_MB = 16
+HEAD_BYTES = 4096
+
+# LogWatcher attributes the fold depends on besides GameState
+WATCHER_FIELDS = ("_bot_init_count", "_hideout_loaded", "_hero_window_open", "_local_account_id", "_party_id")
+STATE_FIELDS = tuple(f.name for f in dataclasses.fields(GameState) if f.name != "clock")
+# SimulatedClock internals, so restored lines get the same timestamps (and year)
+CLOCK_FIELDS = ("now", "year", "_last_prefix", "_last_ts")
+
+
+def default_path(log_path: str | Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + ".kf")
+
+
+def _identity(log_path: Path, engine: PatternEngine) -> dict:
+    from console_log import engine_key
+
+    with open(log_path, "rb") as f:
+        head = hashlib.sha256(f.read(HEAD_BYTES)).hexdigest()
+    return {"version": VERSION, "engine": engine_key(*engine.spec), "head": head}
+
+
+class Keyframe:
+    __slots__ = ("offset", "line", "state", "watcher", "clock")
+
+    def __init__(self, offset: int, line: int, state: dict, watcher: dict, clock: dict):
+        self.offset = offset
+        self.line = line
+        self.state = state
+        self.watcher = watcher
+        self.clock = clock
+
+    @classmethod
+    def capture(cls, watcher: LogWatcher, offset: int, line: int) -> Keyframe:
+        state = {}
+        for name in STATE_FIELDS:
+            value = getattr(watcher.state, name)
+            state[name] = value.name if isinstance(value, (GamePhase, MatchMode)) else value
+        internals = {name: getattr(watcher, name) for name in WATCHER_FIELDS}
+        internals["_party_members"] = sorted(watcher._party_members)
+        clock = {name: getattr(watcher.clock, name) for name in CLOCK_FIELDS if hasattr(watcher.clock, name)}
+        return cls(offset, line, state, internals, clock)
+
+    def restore(self, watcher: LogWatcher) -> None:
+        for name, value in self.state.items():
+            if name == "phase":
+                value = GamePhase[value]
+            elif name == "match_mode":
+                value = MatchMode[value]
+            setattr(watcher.state, name, value)
+        for name, value in self.watcher.items():
+            setattr(watcher, name, set(value) if name == "_party_members" else value)
+        for name, value in self.clock.items():
+            setattr(watcher.clock, name, value)
+
+    def to_json(self) -> dict:
+        return {"offset": self.offset, "line": self.line, "state": self.state,
+                "watcher": self.watcher, "clock": self.clock}
+
+
+class Keyframes:
+    def __init__(self, log_path: str | Path, engine: PatternEngine, interval_mb: float = INTERVAL_MB,
+                 path: str | Path | None = None):
+        self.log_path = Path(log_path)
+        self.path = Path(path) if path else default_path(log_path)
+        self.engine = engine
+        self.interval = int(interval_mb * 1024 * 1024)
+        self.frames: list[Keyframe] = []
+        self._next = self.interval
+
+    @classmethod
+    def load(cls, log_path: str | Path, engine: PatternEngine, path: str | Path | None = None) -> Keyframes:
+        """Keyframes for this log and engine; empty when missing or stale."""
+        frames = cls(log_path, engine, path=path)
+        try:
+            with open(frames.path, encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                if {k: header.get(k) for k in ("version", "engine", "head")} != _identity(frames.log_path, engine):
+                    logger.info("Keyframes for %s are stale", frames.log_path)
+                    return frames
+                frames.interval = header["interval"]
+                frames.frames = [Keyframe(**json.loads(line)) for line in f if line.strip()]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return frames
+
+    def before(self, offset: int) -> Keyframe | None:
+        """Last keyframe at or before offset."""
+        i = bisect.bisect_right([k.offset for k in self.frames], offset)
+        return self.frames[i - 1] if i else None
+
+    # -- recording (during a replay from 0) ------------------------------------
+
+    def observe(self, watcher: LogWatcher, offset: int, line: int) -> None:
+        """Call before folding the line at offset; captures once per interval."""
+        if offset >= self._next:
+            self.frames.append(Keyframe.capture(watcher, offset, line))
+            self._next = offset + self.interval
+
+    def save(self) -> None:
+        header = dict(_identity(self.log_path, self.engine), interval=self.interval)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+                for frame in self.frames:
+                    f.write(json.dumps(frame.to_json()) + "\n")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("Could not write keyframes %s: %s", self.path, e)
@@ -0,0 +1,239 @@
+"""
+Line-offset index for console.log, kept in a sidecar file.
+
+The log is memory-mapped and scanned once: the byte offset of every line
+start goes into an array, and every line the pattern chain classifies is
+recorded as an event (line number + kind). Later opens only scan the bytes
+appended since, so repeated inspection and resync never re-read old data.
+The index is thrown away and rebuilt when the log was replaced or truncated
+(size shrank or its first bytes changed) or the patterns changed.
+
+Sidecar layout: one JSON header line, then the raw arrays
+(line offsets as uint64, event line numbers as uint32, event kinds as uint8
+indexes into the header's "kinds" list).
+
+    idx = LogIndex(log_path, engine)
+    idx.update(); idx.save()
+    idx.line(120_000)               # O(1)
+    idx.context(idx.last_event({"map_info"}))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from console_log import PatternEngine
+
+logger = logging.getLogger(__name__)
+
+VERSION = 2
+HEAD_BYTES = 4096   # identifies the file: a new game session rewrites the start
+ACCOUNT = "local_account_id"
+
+
+def default_path(log_path: str | Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + ".idx")
+
+
+class LogIndex:
+    def __init__(self, log_path: str | Path, engine: PatternEngine, path: str | Path | None = None):
+        from console_log import CHAIN_ORDER
+
+        self.log_path = Path(log_path)
+        self.path = Path(path) if path else default_path(log_path)
+        self.engine = engine
+        account = engine.patterns.get(ACCOUNT)
+        self._engine_key = hashlib.sha256(json.dumps(
+            [(name, p.pattern) for name, p, _ in engine.chain] + [account.pattern if account else None]
+        ).encode()).hexdigest()
+        self.kinds = list(CHAIN_ORDER)
+        self._kind_id = {k: i for i, k in enumerate(self.kinds)}
+
+        self.base = 0                 # offset of line 0 (a watcher indexes only its resync window)
+        self.size = 0                 # bytes indexed; always ends on a newline
+        self.head = ""
+        self.offsets = array("Q")     # line number -> byte offset
+        self.event_lines = array("I")
+        self.event_kinds = array("B")
+        self.account_line = -1        # first line carrying the local Steam ID
+        self._dirty = False
+        self._load()
+
+    # -- persistence ----------------------------------------------------------
+
+    def _digest(self, data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != VERSION or header.get("engine") != self._engine_key:
+                    return
+                offsets, lines, kinds = array("Q"), array("I"), array("B")
+                offsets.frombytes(f.read(header["lines"] * offsets.itemsize))
+                lines.frombytes(f.read(header["events"] * lines.itemsize))
+                kinds.frombytes(f.read(header["events"] * kinds.itemsize))
+        except (OSError, ValueError, KeyError, EOFError):
+            return
+        self.base = header["base"]
+        self.size = header["size"]
+        self.head = header["head"]
+        self.account_line = header["account_line"]
+        self.offsets, self.event_lines, self.event_kinds = offsets, lines, kinds
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        header = {
+            "version": VERSION, "engine": self._engine_key, "base": self.base, "size": self.size, "head": self.head,
+            "lines": len(self.offsets), "events": len(self.event_lines),
+            "account_line": self.account_line, "kinds": self.kinds,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                self.offsets.tofile(f)
+                self.event_lines.tofile(f)
+                self.event_kinds.tofile(f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning("Could not write log index %s: %s", self.path, e)
+
+    def _reset(self) -> None:
+        self.base = 0
+        self.size = 0
+        self.head = ""
+        self.offsets = array("Q")
+        self.event_lines = array("I")
+        self.event_kinds = array("B")
+        self.account_line = -1
+
+    # -- building ---------------------------------------------------------------
+
+    def update(self, start: int = 0) -> int:
+        """Index lines appended since the last update. Returns how many were added.
+
+        start only applies when there is nothing indexed yet (first run, or
+        the log was replaced): indexing begins at the first line starting at
+        or after that byte offset instead of at 0, and line numbers count
+        from there.
+        """
+        try:
+            file_size = self.log_path.stat().st_size
+        except OSError:
+            return 0
+        if file_size == 0:
+            if self.size:
+                self._reset()
+                self._dirty = True
+            return 0
+
+        with open(self.log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            head = self._digest(mm[:min(HEAD_BYTES, self.size)]) if self.size else ""
+            if file_size < self.size or head != self.head:
+                if self.size:
+                    logger.info("Log replaced or truncated; rebuilding index")
+                self._reset()
+            if not self.offsets and start > 0:
+                nl = mm.find(b"\n", start - 1)
+                self.base = self.size = nl + 1 if nl >= 0 else len(mm)
+            added = self._scan(mm, len(mm))
+            self.head = self._digest(mm[:min(HEAD_BYTES, self.size)])
+        if added:
+            self._dirty = True
+        return added
+
+    def _scan(self, mm: mmap.mmap, end: int) -> int:
+        chain = self.engine.chain
+        account = self.engine.patterns.get(ACCOUNT)
+        kind_id = self._kind_id
+        offsets, event_lines, event_kinds = self.offsets, self.event_lines, self.event_kinds
+        pos = self.size
+        start_count = len(offsets)
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            if nl < 0:
+                break  # partial last line; picked up once it's complete
+            line_no = len(offsets)
+            offsets.append(pos)
+            text = mm[pos:nl].decode("utf-8", errors="replace").strip()
+            pos = nl + 1
+            if not text:
+                continue
+            for name, pattern, _ in chain:
+                if pattern.search(text):
+                    event_lines.append(line_no)
+                    event_kinds.append(kind_id[name])
+                    break
+            if self.account_line < 0 and account is not None and account.search(text):
+                self.account_line = line_no
+        self.size = pos
+        return len(offsets) - start_count
+
+    # -- lookups ----------------------------------------------------------------
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets)
+
+    def line_span(self, n: int) -> tuple[int, int]:
+        end = self.offsets[n + 1] if n + 1 < len(self.offsets) else self.size
+        return self.offsets[n], end
+
+    def read_lines(self, numbers: Iterable[int]) -> Iterator[tuple[int, str]]:
+        """(line_no, text) for the given line numbers, read straight from their offsets."""
+        with open(self.log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for n in numbers:
+                start, end = self.line_span(n)
+                yield n, mm[start:end].decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def line(self, n: int) -> str:
+        return next(self.read_lines([n]))[1]
+
+    def context(self, n: int, radius: int = 5) -> list[tuple[int, str]]:
+        lo, hi = max(0, n - radius), min(self.line_count, n + radius + 1)
+        return list(self.read_lines(range(lo, hi)))
+
+    def line_at(self, offset: int) -> int:
+        """First line starting at or after a byte offset."""
+        lo, hi = 0, len(self.offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.offsets[mid] < offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def events(self, kinds: set[str] | None = None, start_line: int = 0) -> Iterator[tuple[int, str]]:
+        lines, ids, names = self.event_lines, self.event_kinds, self.kinds
+        lo, hi = 0, len(lines)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if lines[mid] < start_line:
+                lo = mid + 1
+            else:
+                hi = mid
+        for i in range(lo, len(lines)):
+            kind = names[ids[i]]
+            if kinds is None or kind in kinds:
+                yield lines[i], kind
+
+    def last_event(self, kinds: set[str]) -> int | None:
+        ids = {self._kind_id[k] for k in kinds if k in self._kind_id}
+        for i in range(len(self.event_lines) - 1, -1, -1):
+            if self.event_kinds[i] in ids:
+                return self.event_lines[i]
+        return None
@@ -0,0 +1,200 @@
+"""
+Console output as a stream instead of a file: stdin, a Unix socket or TCP.
+
+For setups where the game runs elsewhere (a container, another machine) and
+its console.log is forwarded rather than shared:
+
+    tail -n +1 -F console.log | nc parser-host 7777       (config "log_stream": "tcp:0.0.0.0:7777")
+    tail -n +1 -F console.log | python main.py            ("log_stream": "-")
+
+There is no file to stat and no process to probe. A connection being open is
+the game running; when it closes, the game is treated as closed, exactly like
+the process going away for the file watcher. Lines then go through the same
+classify/apply pipeline as tailed ones. Start the forwarder from the top of
+the log (tail -n +1) so the state catches up; there is no separate resync.
+
+tail -F never exits, so with the forwarders above the connection outlives the
+game. Set "log_stream_idle_timeout" (seconds) to treat a connection that sent
+nothing for that long as closed; the next line counts as the game starting again.
+
+Sources:
+    "-"                stdin (one session; EOF ends it)
+    "tcp:PORT"         listen on 127.0.0.1:PORT, one connection at a time
+    "tcp:HOST:PORT"    listen on HOST (e.g. 0.0.0.0 for other machines)
+    "unix:PATH"/PATH   listen on a Unix socket
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import socket
+import stat
+import sys
+import threading
+from pathlib import Path
+from typing import BinaryIO
+
+from console_log import LogWatcher
+
+logger = logging.getLogger(__name__)
+
+OPENED = object()
+CLOSED = object()
+
+
+class LineSource:
+    """Reads lines on a background thread; the watcher drains them in order
+    together with OPENED / CLOSED markers for every connection."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self._items: queue.SimpleQueue = queue.SimpleQueue()
+        self._server: socket.socket | None = None
+        self._conn: socket.socket | None = None
+        self._unix_path: Path | None = None
+        self._closed = False
+
+    def start(self) -> None:
+        if self.address == "-":
+            target = self._read_stdin
+        else:
+            self._server = self._listen()
+            target = self._accept_loop
+        threading.Thread(target=target, daemon=True, name="log-stream").start()
+
+    def _listen(self) -> socket.socket:
+        if self.address.startswith("tcp:"):
+            host, _, port = self.address[4:].rpartition(":")
+            server = socket.create_server((host or "127.0.0.1", int(port)))
+            host, port = server.getsockname()[:2]
+            logger.info("Waiting for console output on %s:%d", host, port)
+            return server
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError('Unix sockets unavailable; use log_stream "tcp:PORT"')
+        self._unix_path = Path(self.address.removeprefix("unix:"))
+        _unlink_socket(self._unix_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self._unix_path))
+        server.listen()
+        logger.info("Waiting for console output on %s", self._unix_path)
+        return server
+
+    def _pump(self, stream: BinaryIO) -> None:
+        self._items.put(OPENED)
+        try:
+            for raw in stream:
+                self._items.put(raw.decode("utf-8", errors="replace"))
+        except (OSError, ValueError):
+            pass  # reset by peer, or closed under us by close()
+        finally:
+            self._items.put(CLOSED)
+
+    def _read_stdin(self) -> None:
+        self._pump(sys.stdin.buffer)
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                conn, peer = self._server.accept()
+            except OSError:
+                return
+            logger.info("Console stream connected%s", f" from {peer[0]}" if peer else "")
+            self._conn = conn
+            with conn, conn.makefile("rb") as stream:
+                self._pump(stream)
+            self._conn = None
+            logger.info("Console stream closed")
+
+    def drain(self, timeout: float) -> list:
+        """Everything queued, waiting up to timeout for the first item."""
+        try:
+            items = [self._items.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                items.append(self._items.get_nowait())
+            except queue.Empty:
+                return items
+
+    def close(self) -> None:
+        self._closed = True
+        for s in (self._conn, self._server):
+            if s is not None:
+                try:
+                    s.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                s.close()
+        if self._unix_path is not None:
+            _unlink_socket(self._unix_path)
+
+
+def _unlink_socket(path: Path) -> None:
+    """Remove a stale Unix socket; anything else at that path is left alone (bind then fails)."""
+    try:
+        if stat.S_ISSOCK(path.stat().st_mode):
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class StreamWatcher(LogWatcher):
+    """LogWatcher fed from a LineSource instead of tailing log_path.
+
+    With idle_timeout, a connection that sent nothing for that many seconds
+    counts as closed until it sends again.
+    """
+
+    def __init__(self, address: str, idle_timeout: float | None = None, **kwargs):
+        kwargs.setdefault("process_names", [])
+        super().__init__(log_path=address, **kwargs)
+        self.source = LineSource(address)
+        self.idle_timeout = idle_timeout
+        self._last_line = 0.0
+
+    def start(self, poll_interval: float = 1.0) -> None:
+        self.source.start()
+        super().start(poll_interval)
+
+    def step(self, poll_interval: float = 1.0) -> float:
+        lines: list[str] = []
+        for item in self.source.drain(poll_interval):
+            if item is OPENED or item is CLOSED:
+                self._flush(lines)
+                if item is OPENED:
+                    self._last_line = self.clock.time()
+                    if not self._game_was_running:
+                        self._game_started()
+                elif item is CLOSED and self._game_was_running:
+                    self._game_stopped()
+            else:
+                if not self._game_was_running:
+                    # went idle, now sending again: a new game on the same connection
+                    self._game_started()
+                self._last_line = self.clock.time()
+                lines.append(item)
+        self._flush(lines)
+        if (self.idle_timeout and self._game_was_running
+                and self.clock.time() - self._last_line > self.idle_timeout):
+            logger.info("No console output for %.0fs", self.idle_timeout)
+            self._game_stopped()
+        return 0.0  # drain() already waited
+
+    def _flush(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        batch = self._tracer.begin_batch(self.clock.time()) if self._tracer is not None else None
+        self._process_batch(lines, batch)
+        lines.clear()
+
+    def resync(self) -> None:
+        pass  # the stream replays from wherever the sender started
+
+    def is_game_running(self) -> bool:
+        return self._game_was_running
+
+    def stop(self) -> None:
+        super().stop()
+        self.source.close()
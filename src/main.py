@@ -10,37 +10,46 @@ import threading
 import time
 from pathlib import Path
 
-from game_state import GameState, set_hero_store
-from console_log import LogWatcher
-from condebug import launch as launch_deadlock
-from presence import DiscordRPC
-from systray import create_tray_icon
-from hero_data import HeroDataStore
+from typing import TYPE_CHECKING
+
+import app_logging
+import profiling
+from profiling import lazy_import
+
+# presence (pypresence), systray (pystray + PIL), hero_data and console_log are
+# imported on first use so that a bad config or console mode never pays for them.
+if TYPE_CHECKING:
+    from clock import Clock
+    from console_log import LogWatcher, PatternEngine
+    from game_state import GameSnapshot
 
 _FROZEN = getattr(sys, "_MEIPASS", None)
 BUNDLE_DIR = Path(_FROZEN) if _FROZEN else Path(__file__).parent
 EXE_DIR = Path(sys.executable).parent if _FROZEN else Path(__file__).parent
 
 LOG_DIR = EXE_DIR / "logs"
-LOG_DIR.mkdir(exist_ok=True)
 
 LOG_LEVEL = os.environ.get("DEADLOCK_RPC_LOG", "INFO").upper()
 
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt="%H:%M:%S",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(LOG_DIR / "deadlock_rpc.log", encoding="utf-8"),
-    ],
-)
 logger = logging.getLogger("deadlock-rpc")
 SCRIPT_DIR = BUNDLE_DIR
 
 DEADLOCK_APP_ID = "1422450"
 
 
+def setup_logging(config: dict | None = None) -> None:
+    """Start the queued, rotating log pipeline. Called once the config is known."""
+    config = config or {}
+    level_name = os.environ.get("DEADLOCK_RPC_LOG") or config.get("log_level", LOG_LEVEL)
+    LOG_DIR.mkdir(exist_ok=True)
+    app_logging.setup(
+        LOG_DIR / "deadlock_rpc.log",
+        level=getattr(logging, str(level_name).upper(), logging.INFO),
+        max_bytes=config.get("log_max_bytes", app_logging.DEFAULT_MAX_BYTES),
+        backup_count=config.get("log_backup_count", app_logging.DEFAULT_BACKUP_COUNT),
+    )
+
+
 def _steam_install_path_from_registry() -> Path | None:
     """Read Steam's install path from the Windows Registry."""
     if platform.system() != "Windows":
@@ -159,20 +168,26 @@ def find_deadlock_path(config: dict) -> Path | None:
 
 class DeadlockRPC:
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, clock: Clock | None = None, config_path: str | Path | None = None):
         self.config = config
+        self.config_path = config_path
 
-        self.state = GameState()
+        game_state = lazy_import("game_state")
+        self.clock = clock or lazy_import("clock").SYSTEM_CLOCK
+        self.state = game_state.GameState(clock=self.clock)
         self.running = False
 
         # Load hero data from API (or cache) at startup.
         # This must happen before any hero name / asset lookups.
         exe_dir = EXE_DIR
-        self._hero_store = HeroDataStore(cache_dir=exe_dir / "cache")
-        self._hero_store.load()
-        set_hero_store(self._hero_store)
-
-        self.deadlock_path = find_deadlock_path(self.config)
+        with profiling.step("hero data"):
+            hero_data = lazy_import("hero_data")
+            self._hero_store = hero_data.HeroDataStore(cache_dir=exe_dir / "cache")
+            self._hero_store.load()
+            game_state.set_hero_store(self._hero_store)
+
+        with profiling.step("find deadlock"):
+            self.deadlock_path = find_deadlock_path(self.config)
         if self.deadlock_path:
             self.console_log_path = (
                 self.deadlock_path / self.config.get("console_log_relative_path", "game/citadel/console.log")
@@ -183,29 +198,46 @@ class DeadlockRPC:
             logger.warning("Could not find Deadlock. Set deadlock_install_path in config.json.")
             self.console_log_path = None
 
-        self.rpc = DiscordRPC(
+        presence = lazy_import("presence")
+        self.rpc = presence.DiscordRPC(
             application_id=self.config["discord_application_id"],
             assets_config=self.config.get("discord_assets", {}),
         )
 
+        self.tracer = lazy_import("tracing").configure(self.config.get("trace_file"))
+
+        # local match history (history.db next to the exe); "match_history": false turns it off
+        self.history = self.recorder = None
+        if self.config.get("match_history", True):
+            history = lazy_import("history")
+            try:
+                self.history = history.MatchHistory(EXE_DIR / "history.db")
+                self.recorder = history.MatchRecorder(self.history)
+            except Exception as e:
+                logger.warning("Match history disabled: %s", e)
+
+        self.bus = lazy_import("events").EventBus()
         self.watcher: LogWatcher | None = None
+        self.fanout = None
         self.watcher_thread: threading.Thread | None = None
 
     def start(self) -> None:
         self.running = True
 
         logger.info("Connecting to Discord...")
-        if not self.rpc.connect():
+        with profiling.step("discord connect"):
+            connected = self.rpc.connect()
+        if not connected:
             logger.error("Could not connect to Discord. Is Discord running?")
             sys.exit(1)
         logger.info("✓ Connected to Discord")
 
-        if not self.console_log_path:
+        stream = self.config.get("log_stream")
+        if not self.console_log_path and not stream:
             logger.error("No console log path. Cannot continue.")
             sys.exit(1)
 
-        self.watcher = LogWatcher(
-            log_path=self.console_log_path,
+        watcher_args = dict(
             state=self.state,
             patterns=self.config.get("log_patterns", {}),
             map_to_mode=self.config.get("map_to_mode", {}),
@@ -213,7 +245,50 @@ class DeadlockRPC:
             process_names=self.config.get("process_names", ["project8.exe", "deadlock.exe"]),
             resync_max_bytes=self.config.get("resync_max_bytes", 100 * 1024),
             on_state_change=self._on_state_change,
+            bus=self.bus,
+            tracer=self.tracer,
+            clock=self.clock,
+        )
+        if stream:
+            # console output forwarded over stdin / a socket (log_stream.py)
+            self.watcher = lazy_import("log_stream").StreamWatcher(
+                stream, idle_timeout=self.config.get("log_stream_idle_timeout"), **watcher_args,
+            )
+        else:
+            self.watcher = lazy_import("console_log").LogWatcher(
+                log_path=self.console_log_path,
+                index_path=EXE_DIR / "cache" / "console_log.idx" if self.config.get("log_index", True) else None,
+                **watcher_args,
+            )
+
+        metrics_port = self.config.get("metrics_port")
+        if metrics_port:
+            lazy_import("metrics").serve(int(metrics_port))
+
+        # Discord and the other presence outputs, driven by state-change events
+        sinks = lazy_import("sinks")
+        self.fanout = sinks.Fanout(
+            self.bus,
+            # read every time so a reloaded config takes effect
+            idle_interval=lambda: self.config.get("update_interval_seconds", 5),
+            tracer=self.tracer,
+            history=self.history,
         )
+        self.fanout.add(self.rpc)
+        if self.config.get("state_file"):
+            self.fanout.add(sinks.JsonFileSink(EXE_DIR / self.config["state_file"]))
+        state_socket = self.config.get("state_socket")
+        if state_socket:
+            # a Unix socket path is relative to the app, like state_file
+            if not str(state_socket).startswith("tcp:"):
+                state_socket = str(EXE_DIR / state_socket)
+            self.fanout.add(sinks.StreamSink(state_socket))
+        if self.config.get("state_port"):
+            self.fanout.add(sinks.HttpSink(int(self.config["state_port"])))
+        shm = self.config.get("state_shm")
+        if shm:
+            self.fanout.add(lazy_import("shm_state").SharedMemorySink(None if shm is True else str(shm)))
+        self.fanout.start(self.snapshot)
 
         # log reader
         self.watcher_thread = threading.Thread(
@@ -224,40 +299,66 @@ class DeadlockRPC:
         )
         self.watcher_thread.start()
 
-        # periodic RPC refresh
-        update_interval = self.config.get("update_interval_seconds", 5)
-        refresh_thread = threading.Thread(
-            target=self._refresh_loop,
-            args=(update_interval,),
-            daemon=True,
-            name="rpc-refresh",
-        )
-        refresh_thread.start()
-
-    def _refresh_loop(self, interval: float) -> None:
-        """Periodic RPC refresh (runs in its own thread)."""
-        while self.running:
-            try:
-                self.rpc.update(self.state)
-            except Exception as e:
-                logger.error("Refresh error: %s", e)
-            time.sleep(interval)
+        # config.json hot reload
+        if self.config_path and self.config.get("config_reload", True):
+            config_reload = lazy_import("config_reload")
+            config_reload.ConfigReloader(
+                self.config_path, self,
+                poll_interval=self.config.get("config_reload_interval", 2.0),
+            ).start()
+
+    @property
+    def snapshot(self) -> GameSnapshot:
+        """Latest state published by the watcher; what every reader thread should use."""
+        if self.watcher is not None:
+            return self.watcher.snapshot
+        return self.state.snapshot()
+
+    def apply_config(self, config: dict, engine: PatternEngine) -> None:
+        """Switch to a validated config (called from the config-reload thread)."""
+        if config.get("discord_application_id") != self.config.get("discord_application_id"):
+            logger.warning("discord_application_id changed; restart to use the new one")
+        if self.watcher:
+            # picked up by the watcher thread before its next line
+            self.watcher.swap_engine(engine)
+            self.watcher.process_names = config.get("process_names", ["project8.exe", "deadlock.exe"])
+            self.watcher.resync_max_bytes = config.get("resync_max_bytes", 100 * 1024)
+        # nothing re-sends on its own while connected, so push the current
+        # state to Discord again with the new assets
+        self.rpc.set_assets(config.get("discord_assets", {}))
+        if self.fanout:
+            self.fanout.refresh(self.snapshot, self.rpc)
+        self.config = config
 
     def stop(self) -> None:
         self.running = False
+        self.bus.close()
         if self.watcher:
             self.watcher.stop()
-        self.rpc.disconnect()
+        if self.fanout:
+            self.fanout.close()  # disconnects Discord too
+        else:
+            self.rpc.disconnect()
+        if self.history:
+            self.recorder.close(self.clock.time())
+            self.history.close()
+        if self.tracer:
+            try:
+                self.tracer.export_chrome()
+            except OSError as e:
+                # a bad trace_file path shouldn't cut the shutdown short
+                logger.warning("Could not write trace file: %s", e)
         logger.info("Stopped.")
 
-    def _on_state_change(self, state: GameState) -> None:
+    def _on_state_change(self, state: GameSnapshot) -> None:
         hero = state.hero_display_name or "—"
         mode = state.mode_display() if state.is_in_match else "—"
         logger.info(
             "%-15s | Hero: %-20s | Mode: %-15s | Map: %s",
             state.phase.name, hero, mode, state.map_name or "—"
         )
-        self.rpc.update(state)
+        if self.recorder:
+            self.recorder.observe(state)
 
 def main():
     config_path = sys.argv[1] if len(sys.argv) > 1 else "config.json"
@@ -267,11 +368,13 @@ def main():
         config_path = str(SCRIPT_DIR / config_path)
 
     if not Path(config_path).exists():
+        setup_logging()
         logger.error("Config not found: %s", config_path)
         sys.exit(1)
 
     with open(config_path) as f:
         cfg = json.load(f)
+    setup_logging(cfg)
     if cfg.get("discord_application_id", "").startswith("YOUR_"):
         logger.error("Set your Discord Application ID in config.json")
         logger.info("Create one at https://discord.com/developers/applications")
@@ -280,16 +383,27 @@ def main():
     logger.info("Starting Deadlock Discord Rich Presence...")
 
     # Launch Deadlock with -condebug
-    logger.info("Launching Deadlock via Steam with -condebug...")
-    launch_deadlock()
+    # DEADLOCK_RPC_NO_LAUNCH=1 skips this (used by build.py --measure); so does
+    # log_stream, where the game runs somewhere else
+    if not os.environ.get("DEADLOCK_RPC_NO_LAUNCH") and not cfg.get("log_stream"):
+        logger.info("Launching Deadlock via Steam with -condebug...")
+        with profiling.step("launch deadlock"):
+            lazy_import("condebug").launch()
 
-    app = DeadlockRPC(cfg)
+    with profiling.step("app init"):
+        app = DeadlockRPC(cfg, config_path=config_path)
 
     # start the RPC
     app.start()
 
     #create system tray icon, systray or console
-    tray_icon = create_tray_icon(app)
+    # "system_tray": false skips pystray/PIL entirely
+    tray_icon = None
+    if cfg.get("system_tray", True):
+        with profiling.step("tray icon"):
+            tray_icon = lazy_import("systray").create_tray_icon(app)
+
+    profiling.report(logger)
 
     if tray_icon:
         logger.info("Running in system tray. Right-click the icon to see options.")
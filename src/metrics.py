@@ -0,0 +1,216 @@
+"""
+In-process counters and histograms for the watcher and presence pipeline.
+
+Everything the app records goes into one module-level registry (REGISTRY,
+behind the module functions); snapshot() returns a plain dict that the tray
+("Show Metrics") and the optional loopback endpoint (config "metrics_port")
+serialize as JSON. Offline tools record into OFFLINE instead. Recording is a lock + a couple of
+integer adds, cheap enough for the per-line hot path.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_START = time.time()
+
+# 1 µs .. ~67 s, doubling
+_BUCKETS = [1e-6 * 2 ** k for k in range(27)]
+
+
+class Counter:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self.value += n
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Meter:
+    """Counter that also reports a per-second rate over the last minute."""
+
+    __slots__ = ("_lock", "total", "_slots", "_slot_times")
+
+    WINDOW = 60
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.total = 0
+        self._slots = [0] * self.WINDOW
+        self._slot_times = [0] * self.WINDOW
+
+    def mark(self, n: int = 1) -> None:
+        sec = int(time.monotonic())
+        i = sec % self.WINDOW
+        with self._lock:
+            self.total += n
+            if self._slot_times[i] != sec:
+                self._slot_times[i] = sec
+                self._slots[i] = 0
+            self._slots[i] += n
+
+    def snapshot(self) -> dict:
+        now = int(time.monotonic())
+        with self._lock:
+            recent = sum(
+                count for count, t in zip(self._slots, self._slot_times)
+                if now - t < self.WINDOW
+            )
+        return {"total": self.total, "per_second_1m": round(recent / self.WINDOW, 3)}
+
+
+class Histogram:
+    """Fixed exponential buckets (seconds); percentiles are bucket upper bounds."""
+
+    __slots__ = ("_lock", "count", "sum", "min", "max", "_counts")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._counts = [0] * (len(_BUCKETS) + 1)
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(_BUCKETS, value)
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self._counts[i] += 1
+
+    def _percentile(self, q: float) -> float:
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self._counts):
+            seen += c
+            if seen >= target:
+                return _BUCKETS[i] if i < len(_BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            if not self.count:
+                return {"count": 0}
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 6),
+                "mean": self.sum / self.count,
+                "min": self.min,
+                "max": self.max,
+                "p50": self._percentile(0.50),
+                "p90": self._percentile(0.90),
+                "p99": self._percentile(0.99),
+            }
+
+
+class Registry:
+    """A named set of metrics. The app's is REGISTRY (the module functions);
+    offline tools use OFFLINE so replaying a log doesn't show up as live traffic."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Meter | Histogram] = {}
+        self._gauges: dict[str, Callable[[], float | int | None]] = {}
+
+    def _get(self, name: str, cls):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, cls())
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter)
+
+    def meter(self, name: str) -> Meter:
+        return self._get(name, Meter)
+
+    def histogram(self, name: str) -> Histogram:
+        return self._get(name, Histogram)
+
+    def gauge(self, name: str, fn: Callable[[], float | int | None]) -> None:
+        """Register a value computed at snapshot time (ratios, sizes, ...)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> dict:
+        out: dict = {"uptime_seconds": round(time.time() - _START, 1)}
+        # copied under the lock: threads register metrics while a snapshot is served
+        with self._lock:
+            metrics = list(self._metrics.items())
+            gauges = list(self._gauges.items())
+        for name, metric in sorted(metrics, key=lambda item: item[0]):
+            out[name] = metric.snapshot()
+        for name, fn in sorted(gauges, key=lambda item: item[0]):
+            try:
+                out[name] = fn()
+            except Exception:
+                out[name] = None
+        return out
+
+
+REGISTRY = Registry()
+# never served; replays, diffs, the template miner and station hosts record here
+OFFLINE = Registry()
+
+counter = REGISTRY.counter
+meter = REGISTRY.meter
+histogram = REGISTRY.histogram
+gauge = REGISTRY.gauge
+snapshot = REGISTRY.snapshot
+
+
+def snapshot_json(indent: int | None = 2) -> str:
+    return json.dumps(snapshot(), indent=indent)
+
+
+def serve(port: int) -> ThreadingHTTPServer | None:
+    """Serve GET /metrics on 127.0.0.1:port from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = snapshot_json().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            logger.debug("metrics %s", format % args)
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        logger.warning("Metrics endpoint unavailable on port %d: %s", port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    logger.info("Metrics at http://127.0.0.1:%d/metrics", server.server_address[1])
+    return server
@@ -0,0 +1,107 @@
+"""
+Multi-process line classification for big offline replays (parser --replay).
+
+Classifying a line (which pattern matches, and its groups) doesn't depend on
+any state, only applying it does. So a large span of the log is cut into
+chunks at newline boundaries, worker processes classify the chunks in
+parallel, and the caller folds the results strictly in file order.
+
+Each worker runs the same iter_events pass as everything else over its
+chunk and sends back the LogEvents, so only the lines that matter cross the
+process boundary; unclassified lines are dropped in the worker, same as the
+indexed resync.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
+
+if TYPE_CHECKING:
+    from console_log import LogEvent, PatternEngine
+
+CHUNK_BYTES = 8 * 1024 * 1024
+# below this, starting the pool costs more than it saves
+MIN_PARALLEL_BYTES = 32 * 1024 * 1024
+
+
+def chunk_spans(path: str | Path, start: int, end: int, chunk_bytes: int = CHUNK_BYTES) -> list[tuple[int, int]]:
+    """Split [start, end) into spans that each end just after a newline (the last one at end)."""
+    spans = []
+    with open(path, "rb") as f:
+        pos = start
+        while pos < end:
+            cut = pos + chunk_bytes
+            if cut >= end:
+                spans.append((pos, end))
+                break
+            f.seek(cut)
+            f.readline()
+            cut = min(f.tell(), end)
+            spans.append((pos, cut))
+            pos = cut
+    return spans
+
+
+def _classify_chunk(job: tuple[str, int, int, tuple]) -> tuple[int, list[LogEvent]]:
+    """Worker: (lines in chunk, events with chunk-relative line numbers)."""
+    import metrics
+    from console_log import compile_engine, iter_events
+
+    path, start, end, spec = job
+    engine = compile_engine(*spec, registry=metrics.OFFLINE)  # cached per worker process
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    parts = data.split(b"\n")
+    if parts and not parts[-1]:
+        parts.pop()  # chunk ended on a newline
+
+    def lines():
+        offset = start
+        for n, raw in enumerate(parts):
+            text = raw.decode("utf-8", errors="replace").strip()
+            if text:
+                yield n, offset, text
+            offset += len(raw) + 1
+
+    return len(parts), list(iter_events(lines(), engine))
+
+
+def classify_file(
+    path: str | Path,
+    engine: PatternEngine,
+    start: int = 0,
+    end: int | None = None,
+    workers: int | None = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    line_time: Callable[[str], float | None] | None = None,
+) -> Iterator[LogEvent]:
+    """LogEvents of path[start:end] in file order, classified across a process pool.
+
+    start must be at a line start. Line numbers count from start. Pattern hit
+    metrics and line timestamps are done here, as the events are handed out.
+    """
+    path = str(path)
+    if end is None:
+        end = os.path.getsize(path)
+    jobs = [(path, s, e, engine.spec) for s, e in chunk_spans(path, start, end, chunk_bytes)]
+    hits = engine.hits
+    base = 0
+    # spawn, not fork: forking a process that has other threads running can
+    # deadlock the child on a lock one of them held
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # map() yields in submission order, so chunks fold in file order
+        for count, events in pool.map(_classify_chunk, jobs):
+            for event in events:
+                if event.kind is not None:
+                    hits[event.kind].inc()
+                yield event._replace(
+                    line_no=base + event.line_no,
+                    timestamp=line_time(event.text) if line_time else None,
+                )
+            base += count
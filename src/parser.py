@@ -1,6 +1,5 @@
 import json
 import re
-import sys
 from pathlib import Path
 
 PRIMARY = {
@@ -23,59 +22,142 @@ PRIMARY = {
 }
 
 
+SAMPLE_LIMIT = 15
+
+
+def _iter_lines(log_path: str):
+    """Stream (line_number, line) without holding the file in memory."""
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        yield from enumerate(f)
+
+
 def inspect(log_path: str):
-    lines = Path(log_path).read_text(errors="replace").splitlines()
-    print(f"Loaded {len(lines)} lines\n")
+    # One pass over the file. Most lines match nothing, so a single combined
+    # regex rejects them up front; only hits are re-checked per pattern
+    # (a line can match more than one). Per pattern we keep a count and the
+    # first SAMPLE_LIMIT matches, so memory stays flat however big the log is.
+    compiled = {name: re.compile(p, re.IGNORECASE) for name, p in PRIMARY.items()}
+    any_primary = re.compile("|".join(f"(?:{p})" for p in PRIMARY.values()), re.IGNORECASE)
 
-    for name, pattern in PRIMARY.items():
-        matches = [(i, l.strip()) for i, l in enumerate(lines) if re.search(pattern, l, re.IGNORECASE)]
-        if not matches:
+    counts = dict.fromkeys(PRIMARY, 0)
+    samples: dict[str, list[tuple[int, str]]] = {name: [] for name in PRIMARY}
+    total = 0
+
+    for i, line in _iter_lines(log_path):
+        total += 1
+        if not any_primary.search(line):
             continue
-        print(f"── {name} ({len(matches)} matches) ──")
+        for name, pattern in compiled.items():
+            if pattern.search(line):
+                counts[name] += 1
+                if len(samples[name]) < SAMPLE_LIMIT:
+                    samples[name].append((i, line.strip()))
+
+    print(f"Loaded {total} lines\n")
+
+    for name in PRIMARY:
+        count = counts[name]
+        if not count:
+            continue
+        print(f"── {name} ({count} matches) ──")
         seen = set()
-        for line_num, text in matches[:15]:
+        for line_num, text in samples[name]:
             key = re.sub(r'\d+', 'N', text)[:80]
             if key not in seen:
                 seen.add(key)
                 print(f"  L{line_num:>5}: {text[:200]}")
-        if len(matches) > 15:
-            print(f"  ... +{len(matches) - 15} more")
+        if count > SAMPLE_LIMIT:
+            print(f"  ... +{count - SAMPLE_LIMIT} more")
         print()
 
     print("Summary:")
-    for name, pattern in PRIMARY.items():
-        count = sum(1 for l in lines if re.search(pattern, l, re.IGNORECASE))
-        if count:
-            print(f"  {name:<25} {count:>5}")
-
+    for name in PRIMARY:
+        if counts[name]:
+            print(f"  {name:<25} {counts[name]:>5}")
 
-def replay(log_path: str, config_path: str = "config.json"):
-    from game_state import GameState, GamePhase
-    from console_log import LogWatcher
 
+def load_config(config_path: str | Path) -> dict:
     with open(config_path) as f:
-        config = json.load(f)
+        return json.load(f)
 
-    lines = Path(log_path).read_text(errors="replace").splitlines()
-    print(f"Replaying {len(lines)} lines...\n")
 
-    state = GameState()
+def make_watcher(log_path: str | Path, config: dict, clock=None):
+    """A LogWatcher wired for offline replay (no process probing, no callback).
+
+    Defaults to a SimulatedClock driven by the log's own line timestamps, so
+    match and queue times are those of the original session.
+    """
+    import metrics
+    from clock import SimulatedClock
+    from game_state import GameState
+    from console_log import LogWatcher
+
+    clock = clock or SimulatedClock()
+    state = GameState(clock=clock)
     state.enter_main_menu()
 
-    watcher = LogWatcher(
+    return LogWatcher(
         log_path=log_path, state=state,
         patterns=config.get("log_patterns", {}),
         map_to_mode=config.get("map_to_mode", {}),
         hideout_maps=config.get("hideout_maps", ["dl_hideout"]),
         process_names=[],
+        clock=clock,
+        registry=metrics.OFFLINE,
     )
 
-    transitions = [("START", state.phase.name, state.hero_display_name, state.map_name)]
 
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if line and watcher._process_line(line):
-            transitions.append((f"L{i}", state.phase.name, state.hero_display_name, state.map_name))
+def replay(log_path: str, config_path: str = "config.json", workers: int | None = None,
+           start: int = 0, keyframe_mb: float | None = None):
+    """Print the transitions from byte offset start on.
+
+    Seeks to the nearest keyframe (<log>.kf) at or before start. A replay that
+    has to begin at 0 records keyframes every keyframe_mb on the way.
+    """
+    import keyframes
+    import parallel_classify
+    from console_log import read_lines
+
+    config = load_config(config_path)
+    watcher = make_watcher(log_path, config)
+    state = watcher.state
+
+    frames = keyframes.Keyframes.load(log_path, watcher.engine)
+    frame = frames.before(start) if start else None
+    recorder = None
+    if frame is not None:
+        frame.restore(watcher)
+        begin, line0 = frame.offset, frame.line
+        print(f"Seeking from keyframe at L{line0} (byte {begin})")
+    else:
+        begin = line0 = 0
+        recorder = keyframes.Keyframes(log_path, watcher.engine, keyframe_mb or keyframes.INTERVAL_MB)
+
+    if Path(log_path).stat().st_size - begin >= parallel_classify.MIN_PARALLEL_BYTES:
+        # big log: classify across processes, fold here in order
+        print("Replaying (classifying in parallel)...\n")
+        events = parallel_classify.classify_file(log_path, watcher.engine, start=begin, workers=workers,
+                                                 line_time=getattr(watcher.clock, "line_time", None))
+        events = (e._replace(line_no=line0 + e.line_no) for e in events)
+    else:
+        print(f"Replaying from L{line0}...\n")
+        events = watcher.events(read_lines(log_path, begin, line0))
+
+    transitions = []
+    for event in events:
+        if recorder is not None:
+            recorder.observe(watcher, event.offset, event.line_no)
+        if event.offset < start:
+            watcher.apply_event(event)
+            continue
+        if not transitions:
+            transitions.append(("START", state.phase.name, state.hero_display_name, state.map_name))
+        if watcher.apply_event(event):
+            transitions.append((f"L{event.line_no}", state.phase.name, state.hero_display_name, state.map_name))
+    if not transitions:
+        transitions.append(("START", state.phase.name, state.hero_display_name, state.map_name))
+    if recorder is not None and recorder.frames:
+        recorder.save()
 
     print(f"{'Line':<8} {'Phase':<18} {'Hero':<22} {'Map'}")
     print("─" * 60)
@@ -84,12 +166,241 @@ def replay(log_path: str, config_path: str = "config.json"):
     print(f"\n{len(transitions)} state transitions")
 
 
+def open_index(log_path: str | Path, config: dict):
+    """The log's sidecar index (<log>.idx), brought up to date."""
+    import metrics
+    from console_log import compile_engine
+    from log_index import LogIndex
+
+    engine = compile_engine(
+        config.get("log_patterns", {}), config.get("hideout_maps", ["dl_hideout"]), config.get("map_to_mode", {}),
+        registry=metrics.OFFLINE,
+    )
+    index = LogIndex(log_path, engine)
+    added = index.update()
+    index.save()
+    print(f"Index: {index.line_count} lines, {len(index.event_lines)} events ({added} lines newly indexed)\n")
+    return index
+
+
+def show_context(log_path: str, config_path: str, line: int | None = None, event: str | None = None,
+                 nth: int = -1, radius: int = 5):
+    index = open_index(log_path, load_config(config_path))
+    if event:
+        hits = [n for n, _ in index.events({event})]
+        if not hits:
+            print(f"No '{event}' events")
+            return
+        try:
+            line = hits[nth]
+        except IndexError:
+            print(f"Only {len(hits)} '{event}' events")
+            return
+        print(f"'{event}' event {nth % len(hits) + 1} of {len(hits)}")
+    if not 0 <= line < index.line_count:
+        print(f"Line {line} out of range (0-{index.line_count - 1})")
+        return
+    lo = max(0, line - radius)
+    marks = {n: kind for n, kind in index.events(start_line=lo) if n <= line + radius}
+    for n, text in index.context(line, radius):
+        marker = ">>" if n == line else "  "
+        kind = f"[{marks[n]}]" if n in marks else ""
+        print(f"{marker} L{n:>7} {kind:<22} {text[:180]}")
+
+
+# ── corpus replay ─────────────────────────────────────────────────────────────
+
+def expand_corpus(target: str) -> list[Path]:
+    """A directory (recursively, *.log), a glob, or a single file."""
+    p = Path(target)
+    if p.is_dir():
+        return sorted(f for f in p.rglob("*.log") if f.is_file())
+    if any(ch in target for ch in "*?["):
+        base = Path(p.anchor) if p.is_absolute() else Path(".")
+        pattern = str(p.relative_to(p.anchor)) if p.is_absolute() else target
+        return sorted(f for f in base.glob(pattern) if f.is_file())
+    return [p] if p.is_file() else []
+
+
+def replay_records(log_path: str | Path, config: dict) -> list[dict]:
+    """Replay one log and return its transition timeline as plain dicts."""
+    from console_log import read_lines
+
+    watcher = make_watcher(log_path, config)
+    state = watcher.state
+    records = []
+    for event, changed in watcher.fold(watcher.events(read_lines(log_path))):
+        if changed:
+            records.append({
+                "file": str(log_path),
+                "line": event.line_no,
+                "phase": state.phase.name,
+                "hero": state.hero_key,
+                "mode": state.match_mode.name,
+                "map": state.map_name,
+                "party_size": state.party_size,
+                "time": watcher.clock.time(),
+                "match_start": state.match_start_time,
+            })
+    return records
+
+
+def _replay_worker(job: tuple[str, dict]) -> tuple[str, list[dict], float]:
+    import time
+
+    log_path, config = job
+    t = time.perf_counter()
+    records = replay_records(log_path, config)
+    return log_path, records, time.perf_counter() - t
+
+
+def summarize(records: list[dict]) -> dict:
+    """Matches per file timeline: entering IN_MATCH starts one, leaving it ends it.
+
+    The mode counted is the last one seen while the match was running; a match
+    that never got a hero is a hero-lock failure. Durations come from the
+    replay clock (line timestamps), from match start to the first transition
+    out of IN_MATCH.
+    """
+    from collections import Counter
+
+    matches = 0
+    modes: Counter = Counter()
+    hero_failures: list[dict] = []
+    durations: list[float] = []
+    by_file: dict[str, list[dict]] = {}
+    for r in records:
+        by_file.setdefault(r["file"], []).append(r)
+
+    for timeline in by_file.values():
+        current = None
+        for r in timeline + [None]:
+            in_match = r is not None and r["phase"] == "IN_MATCH"
+            if in_match:
+                if current is None:
+                    matches += 1
+                    current = {"file": r["file"], "line": r["line"], "hero": None, "mode": "UNKNOWN",
+                               "start": r.get("match_start")}
+                current["hero"] = r["hero"] or current["hero"]
+                current["mode"] = r["mode"]
+            elif current is not None:
+                modes[current["mode"]] += 1
+                if r is not None and current["start"] and r.get("time"):
+                    durations.append(r["time"] - current["start"])
+                if current["hero"] is None:
+                    hero_failures.append({"file": current["file"], "line": current["line"]})
+                current = None
+
+    return {
+        "files": len(by_file),
+        "transitions": len(records),
+        "matches": matches,
+        "modes": dict(modes.most_common()),
+        "hero_lock_failures": hero_failures,
+        "avg_match_seconds": sum(durations) / len(durations) if durations else None,
+    }
+
+
+def replay_corpus(target: str, config_path: str = "config.json", out_path: str = "replay_corpus.jsonl",
+                  workers: int | None = None):
+    """Replay every log in a corpus across a process pool; one LogWatcher per file."""
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    files = expand_corpus(target)
+    if not files:
+        print(f"No logs found for {target}")
+        return
+    config = load_config(config_path)
+
+    t0 = time.perf_counter()
+    results: dict[str, list[dict]] = {}
+    # biggest logs first so one huge session doesn't end up last on a single worker
+    jobs = [(str(f), config) for f in sorted(files, key=lambda f: f.stat().st_size, reverse=True)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for log_path, records, dt in pool.map(_replay_worker, jobs):
+            results[log_path] = records
+    elapsed = time.perf_counter() - t0
+
+    # merge in corpus order so the JSONL is deterministic
+    merged = [r for f in files for r in results[str(f)]]
+    with open(out_path, "w", encoding="utf-8") as out:
+        for r in merged:
+            out.write(json.dumps(r) + "\n")
+
+    summary = summarize(merged)
+    print(f"Replayed {len(files)} logs in {elapsed:.2f}s → {out_path}\n")
+    print(f"  transitions          {summary['transitions']:>6}")
+    print(f"  matches detected     {summary['matches']:>6}")
+    for mode, count in summary["modes"].items():
+        print(f"    {mode:<18} {count:>6}")
+    if summary["avg_match_seconds"] is not None:
+        print(f"  avg match length     {summary['avg_match_seconds'] / 60:>6.1f} min")
+    failures = summary["hero_lock_failures"]
+    print(f"  hero-lock failures   {len(failures):>6}")
+    for f in failures[:10]:
+        print(f"    {f['file']} L{f['line']}")
+    if len(failures) > 10:
+        print(f"    ... +{len(failures) - 10} more")
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python inspect_log.py <console.log> [--replay]")
-        sys.exit(1)
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Inspect or replay Deadlock console.log files")
+    ap.add_argument("log", help="console.log (or a directory / glob with --corpus)")
+    ap.add_argument("--replay", action="store_true", help="replay through LogWatcher and print transitions")
+    ap.add_argument("--start", type=int, default=0,
+                    help="with --replay, list transitions from this byte offset on (seeks via keyframes)")
+    ap.add_argument("--keyframe-mb", type=float, default=None,
+                    help="with --replay, MB between the keyframes written to <log>.kf (default 16)")
+    ap.add_argument("--corpus", action="store_true", help="replay every log under a directory or glob in parallel")
+    ap.add_argument("--config", default=str(Path(__file__).parent / "config.json"))
+    ap.add_argument("--templates", action="store_true",
+                    help="cluster every line into templates and list unmatched ones near transitions")
+    ap.add_argument("--line", type=int, default=None, help="show the lines around line N (uses the index)")
+    ap.add_argument("--event", default=None,
+                    help="show the lines around the last event of this kind, e.g. map_info (uses the index)")
+    ap.add_argument("--nth", type=int, default=-1, help="which --event occurrence (0 = first, -1 = last)")
+    ap.add_argument("--context", type=int, default=5, help="lines either side for --line / --event")
+    ap.add_argument("--top", type=int, default=40, help="templates to list with --templates")
+    ap.add_argument("--out", default=None, help="output file for --corpus (JSONL) or --templates (JSON)")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size for --corpus, and --replay of big logs")
+    ap.add_argument("--diff", action="store_true",
+                    help="replay with a reference and a candidate engine and report the first divergence")
+    ap.add_argument("--ref-src", default=str(Path(__file__).parent), help="reference engine source dir")
+    ap.add_argument("--ref-config", default=None, help="reference config (default: <ref-src>/config.json)")
+    ap.add_argument("--cand-src", default=str(Path(__file__).parent), help="candidate engine source dir")
+    ap.add_argument("--cand-config", default=None, help="candidate config (default: <cand-src>/config.json)")
+    args = ap.parse_args()
+
+    if args.diff:
+        import sys
+        from engine_diff import diff
+
+        logs = expand_corpus(args.log)
+        if not logs:
+            print(f"No logs found for {args.log}")
+            sys.exit(1)
+        ref_src, cand_src = Path(args.ref_src), Path(args.cand_src)
+        ok = diff(
+            logs,
+            ref_src, Path(args.ref_config) if args.ref_config else ref_src / "config.json",
+            cand_src, Path(args.cand_config) if args.cand_config else cand_src / "config.json",
+        )
+        sys.exit(0 if ok else 1)
+    elif args.line is not None or args.event:
+        show_context(args.log, args.config, args.line, args.event, args.nth, args.context)
+    elif args.templates:
+        import template_miner
 
-    if "--replay" in sys.argv:
-        replay(sys.argv[1])
+        miner = template_miner.mine(args.log, load_config(args.config))
+        template_miner.report(miner, args.top)
+        if args.out:
+            template_miner.write_json(miner, args.out)
+    elif args.corpus:
+        replay_corpus(args.log, args.config, args.out or "replay_corpus.jsonl", args.workers)
+    elif args.replay:
+        replay(args.log, args.config, args.workers, args.start, args.keyframe_mb)
     else:
-        inspect(sys.argv[1])
\ No newline at end of file
+        inspect(args.log)
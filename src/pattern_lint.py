@@ -0,0 +1,354 @@
+"""
+Cost profiler and backtracking linter for config.json log_patterns.
+
+    python pattern_lint.py [--config config.json] [console.log ...] [--max-lines N]
+
+For each pattern, compiled the same way LogWatcher does (re.IGNORECASE, run
+with search() against every line), it reports:
+
+  * ns/line and match rate over a log corpus (or a synthetic line set),
+  * static findings from the parsed regex: nested or adjacent overlapping
+    quantifiers, unanchored leading `.*`, greedy `.*` between literals,
+  * a growth test on adversarial inputs, run in a child process with a
+    timeout, that flags superlinear or catastrophic backtracking,
+  * the longest literal every match must contain, suggested as a literal
+    anchor: IGNORECASE turns off the regex engine's literal-prefix fast scan,
+    so patterns that don't lead with a literal pay a full scan per line.
+
+Exits 1 if any pattern has an error-level finding, so it can gate a config change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import re
+import sys
+import time
+from pathlib import Path
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+    from re._constants import (
+        ANY, AT, BRANCH, CATEGORY, IN, LITERAL, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, NEGATE,
+        NOT_LITERAL, RANGE, SUBPATTERN,
+    )
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse  # type: ignore[no-redef]
+    from sre_constants import (  # type: ignore[no-redef]
+        ANY, AT, BRANCH, CATEGORY, IN, LITERAL, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, NEGATE,
+        NOT_LITERAL, RANGE, SUBPATTERN,
+    )
+
+REPEATS = (MAX_REPEAT, MIN_REPEAT)
+GROWTH_SIZES = (500, 1000, 2000, 4000)
+GROWTH_TIMEOUT = 3.0
+# time(8n)/time(n): ~8 linear, ~64 quadratic, ~512 cubic. Quadratic is what a
+# `.*` costs under search() on a pathological line (a warning, since real
+# lines are short); anything steeper is an error.
+QUADRATIC_GROWTH = 24.0
+CATASTROPHIC_GROWTH = 200.0
+
+# characters the overlap check reasons about
+_ALPHABET = [chr(c) for c in range(32, 127)] + ["\t"]
+_CATEGORIES = {
+    "CATEGORY_DIGIT": str.isdigit,
+    "CATEGORY_NOT_DIGIT": lambda c: not c.isdigit(),
+    "CATEGORY_SPACE": str.isspace,
+    "CATEGORY_NOT_SPACE": lambda c: not c.isspace(),
+    "CATEGORY_WORD": lambda c: c.isalnum() or c == "_",
+    "CATEGORY_NOT_WORD": lambda c: not (c.isalnum() or c == "_"),
+}
+
+_SYNTHETIC = [
+    "[Client] CL:  Connected to '10.0.0.1:27015'",
+    "[HostStateManager] Host activate: Loading (dl_midtown)",
+    "VMDL Camera Pose Success! models/heroes_staging/inferno/inferno.vmdl",
+    "ChangeGameState: GameInProgress (7)",
+] + [f"[Noise] ent {i} think {i * 7} models/props/crate_{i}.vmdl" for i in range(2000)]
+
+
+# ── static analysis ───────────────────────────────────────────────────────────
+
+def _is_repeat(op, av) -> bool:
+    return op in REPEATS and (av[1] == MAXREPEAT or av[1] > 1)
+
+
+def _char_set(op, av) -> frozenset | None:
+    """Characters (of _ALPHABET, case-folded) a single-char item can consume."""
+    if op == LITERAL:
+        return frozenset({chr(av).lower()})
+    if op == NOT_LITERAL:
+        return frozenset(c for c in _ALPHABET if c.lower() != chr(av).lower())
+    if op == ANY:
+        return frozenset(_ALPHABET)
+    if op == IN:
+        negate = False
+        chars: set[str] = set()
+        for sub_op, sub_av in av:
+            if sub_op == NEGATE:
+                negate = True
+            elif sub_op == LITERAL:
+                chars.add(chr(sub_av).lower())
+            elif sub_op == RANGE:
+                chars.update(c.lower() for c in _ALPHABET if sub_av[0] <= ord(c) <= sub_av[1])
+            elif sub_op == CATEGORY:
+                pred = _CATEGORIES.get(str(sub_av))
+                if pred is None:
+                    return frozenset(_ALPHABET)
+                chars.update(c for c in _ALPHABET if pred(c))
+        if negate:
+            return frozenset(c for c in _ALPHABET if c.lower() not in chars)
+        return frozenset(chars)
+    return None
+
+
+def _overlaps(a, b) -> bool:
+    return a is not None and b is not None and bool(a & b)
+
+
+def _repeat_body_set(av):
+    body = list(av[2])
+    if len(body) == 1:
+        return _char_set(*body[0])
+    return None
+
+
+def _walk(seq, findings: list[tuple[str, str]], depth_repeat: int = 0) -> None:
+    items = list(seq)
+    for i, (op, av) in enumerate(items):
+        if op in REPEATS:
+            if _is_repeat(op, av) and depth_repeat:
+                findings.append(("error", "nested quantifier: a repeat inside a repeat can backtrack exponentially"))
+            _walk(av[2], findings, depth_repeat + (1 if _is_repeat(op, av) else 0))
+            # adjacent unbounded repeats over overlapping sets: \s+\s*, \w+\d+, .*.*
+            if i + 1 < len(items) and _is_repeat(op, av):
+                nop, nav = items[i + 1]
+                if nop in REPEATS and _is_repeat(nop, nav):
+                    if _overlaps(_repeat_body_set(av), _repeat_body_set(nav)):
+                        findings.append(("warn", "adjacent quantifiers over overlapping characters split input ambiguously"))
+        elif op == SUBPATTERN:
+            _walk(av[-1], findings, depth_repeat)
+        elif op == BRANCH:
+            for branch in av[1]:
+                _walk(branch, findings, depth_repeat)
+
+
+def _is_dot_star(op, av) -> bool:
+    body = list(av[2]) if op in REPEATS else []
+    return op in REPEATS and av[1] == MAXREPEAT and len(body) == 1 and body[0][0] == ANY
+
+
+def _required_literals(seq) -> list[str]:
+    """Literal runs on the top-level path (text every match must contain)."""
+    runs, current = [], []
+    for op, av in seq:
+        if op == LITERAL:
+            current.append(chr(av))
+            continue
+        if op == SUBPATTERN:
+            inner = _required_literals(av[-1])
+            if current:
+                runs.append("".join(current))
+                current = []
+            runs.extend(inner)
+            continue
+        if op in REPEATS and av[0] >= 1 and len(list(av[2])) == 1 and list(av[2])[0][0] == LITERAL:
+            current.append(chr(list(av[2])[0][1]))  # x+ requires at least one x
+        if current:
+            runs.append("".join(current))
+            current = []
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def lint(pattern: str) -> dict:
+    parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    items = list(parsed)
+    findings: list[tuple[str, str]] = []
+    _walk(items, findings)
+
+    if items and _is_dot_star(*items[0]):
+        findings.append(("warn", "leading .* is redundant with search() and rescans the line from every offset"))
+    for i, (op, av) in enumerate(items[1:-1], start=1):
+        if _is_dot_star(op, av):
+            findings.append(("info", "greedy .* between literals backtracks over the rest of the line; a negated class ([^x]*) is cheaper"))
+            break
+
+    literals = sorted(_required_literals(items), key=len, reverse=True)
+    anchor = literals[0] if literals else ""
+    leads_with_literal = bool(items) and items[0][0] == LITERAL
+    if not leads_with_literal:
+        if items and items[0][0] == AT:
+            pass
+        elif len(anchor) >= 4:
+            findings.append(("info", f"no leading literal; anchor with a literal prefilter such as {anchor!r} in line"))
+        else:
+            findings.append(("warn", "no literal of 4+ chars to anchor on; every line pays a full regex scan"))
+
+    # dedupe, keep order
+    seen, unique = set(), []
+    for f in findings:
+        if f not in seen:
+            seen.add(f)
+            unique.append(f)
+    return {"findings": unique, "anchor": anchor, "leads_with_literal": leads_with_literal}
+
+
+# ── dynamic growth test ───────────────────────────────────────────────────────
+
+def _adversarial_inputs(pattern: str, anchor: str, n: int) -> list[str]:
+    prefix = anchor or ""
+    return [
+        prefix + " " * n,
+        prefix + "a" * n,
+        prefix + "(" * n,
+        prefix + "a " * (n // 2),
+        prefix + "/" * n,
+        (prefix + " ") * max(1, n // max(1, len(prefix) + 1)),
+    ]
+
+
+def _growth_child(pattern: str, anchor: str, conn) -> None:
+    compiled = re.compile(pattern, re.IGNORECASE)
+    timings = []
+    for n in GROWTH_SIZES:
+        inputs = _adversarial_inputs(pattern, anchor, n)
+        t = time.perf_counter()
+        for s in inputs:
+            compiled.search(s)
+        timings.append(time.perf_counter() - t)
+        conn.send(timings)
+    conn.close()
+
+
+def growth_test(pattern: str, anchor: str) -> dict:
+    """Time adversarial inputs of growing size in a child; a hang means catastrophic."""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_growth_child, args=(pattern, anchor, child), daemon=True)
+    proc.start()
+    child.close()
+    timings: list[float] = []
+    deadline = time.monotonic() + GROWTH_TIMEOUT
+    while time.monotonic() < deadline and len(timings) < len(GROWTH_SIZES):
+        if parent.poll(max(0.0, deadline - time.monotonic())):
+            try:
+                timings = parent.recv()
+            except EOFError:
+                break
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+
+    if len(timings) < len(GROWTH_SIZES):
+        return {"status": "timeout", "timings": timings}
+    first, last = max(timings[0], 1e-7), timings[-1]
+    growth = last / first
+    if last < 0.0005:  # too fast to mean anything
+        status = "ok"
+    elif growth > CATASTROPHIC_GROWTH:
+        status = "catastrophic"
+    elif growth > QUADRATIC_GROWTH:
+        status = "quadratic"
+    else:
+        status = "ok"
+    return {"status": status, "growth": round(growth, 1), "timings": timings}
+
+
+# ── cost profile ──────────────────────────────────────────────────────────────
+
+def load_lines(paths: list[str], max_lines: int) -> list[str]:
+    if not paths:
+        return list(_SYNTHETIC)
+    lines: list[str] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines.extend(line.strip() for line in itertools.islice(f, max_lines - len(lines)))
+        if len(lines) >= max_lines:
+            break
+    return [l for l in lines if l]
+
+
+def profile(pattern: str, lines: list[str]) -> dict:
+    search = re.compile(pattern, re.IGNORECASE).search
+    hits = 0
+    t = time.perf_counter_ns()
+    for line in lines:
+        if search(line) is not None:
+            hits += 1
+    elapsed = time.perf_counter_ns() - t
+    return {"ns_per_line": elapsed / len(lines) if lines else 0.0, "matches": hits,
+            "match_rate": hits / len(lines) if lines else 0.0}
+
+
+def run(patterns: dict[str, str], lines: list[str]) -> dict[str, dict]:
+    report: dict[str, dict] = {}
+    for name, pattern in patterns.items():
+        if name.startswith("_"):
+            continue
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            report[name] = {"pattern": pattern, "findings": [("error", f"does not compile: {e}")]}
+            continue
+        entry = {"pattern": pattern, **lint(pattern), **profile(pattern, lines)}
+        growth = growth_test(pattern, entry["anchor"])
+        entry["growth"] = growth
+        scale = GROWTH_SIZES[-1] // GROWTH_SIZES[0]
+        if growth["status"] == "timeout":
+            entry["findings"].insert(0, ("error", f"catastrophic backtracking: adversarial input did not finish in {GROWTH_TIMEOUT:.0f}s"))
+        elif growth["status"] == "catastrophic":
+            entry["findings"].insert(0, ("error", f"catastrophic backtracking: {growth['growth']}x time for {scale}x input"))
+        elif growth["status"] == "quadratic":
+            entry["findings"].insert(0, ("warn", f"quadratic on long lines: {growth['growth']}x time for {scale}x input"))
+        report[name] = entry
+    return report
+
+
+def print_report(report: dict[str, dict], line_count: int) -> bool:
+    ok = True
+    print(f"{'pattern':<24} {'ns/line':>9} {'match %':>8}  findings")
+    print("─" * 90)
+    ordered = sorted(report.items(), key=lambda kv: kv[1].get("ns_per_line", float("inf")), reverse=True)
+    total_ns = 0.0
+    for name, entry in ordered:
+        ns = entry.get("ns_per_line")
+        total_ns += ns or 0.0
+        rate = entry.get("match_rate")
+        cost = f"{ns:9.0f}" if ns is not None else f"{'—':>9}"
+        pct = f"{rate * 100:7.3f}%" if rate is not None else f"{'—':>8}"
+        findings = entry["findings"]
+        first = f"[{findings[0][0]}] {findings[0][1]}" if findings else ""
+        print(f"{name:<24} {cost} {pct}  {first}")
+        for level, text in findings[1:]:
+            print(f"{'':<44}[{level}] {text}")
+        if any(level == "error" for level, _ in findings):
+            ok = False
+    print(f"\n{len(report)} patterns over {line_count} lines: {total_ns:,.0f} ns/line if every pattern ran")
+    return ok
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Profile and lint config.json log_patterns")
+    ap.add_argument("logs", nargs="*", help="console.log files to measure against (default: synthetic lines)")
+    ap.add_argument("--config", default=str(Path(__file__).parent / "config.json"))
+    ap.add_argument("--max-lines", type=int, default=200_000)
+    ap.add_argument("--json", help="write the full report here")
+    args = ap.parse_args()
+
+    with open(args.config) as f:
+        patterns = json.load(f).get("log_patterns", {})
+    lines = load_lines(args.logs, args.max_lines)
+
+    report = run(patterns, lines)
+    ok = print_report(report, len(lines))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=list), encoding="utf-8")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 from __future__ import annotations
 import logging
-from pypresence import Presence, exceptions as rpc_exceptions
-from game_state import GamePhase, GameState, MatchMode
+import time
+from typing import TYPE_CHECKING
+import metrics
+import tracing
+from profiling import lazy_import
+from game_state import GamePhase, MatchMode
+from sinks import Payload, Sink
+if TYPE_CHECKING:
+    from pypresence import Presence
 logger = logging.getLogger(__name__)
 
 PARTY_MAX = 6
 
-class DiscordRPC:
+class DiscordRPC(Sink):
+    name = "discord"
+    traced = True  # stamps payload / ipc_send on traced transitions
 
     def __init__(self, application_id: str, assets_config: dict):
         self.application_id = application_id
@@ -14,8 +23,21 @@ class DiscordRPC:
         self.rpc: Presence | None = None
         self._connected = False
         self._last_update_hash = None
+        self._ever_connected = False
+        self._last_data: dict | None = None
+
+        self._m_updates = metrics.counter("discord.updates")
+        self._m_deduped = metrics.counter("discord.deduped")
+        self._m_sent = metrics.counter("discord.sent")
+        self._m_errors = metrics.counter("discord.errors")
+        self._m_reconnects = metrics.counter("discord.reconnects")
+        self._m_send_latency = metrics.histogram("discord.send_seconds")
+        metrics.gauge("discord.dedupe_hit_rate", self._dedupe_hit_rate)
 
     def connect(self) -> bool:
+        # deferred (and timed when profiling): pulls in asyncio + json-rpc plumbing
+        Presence = lazy_import("pypresence").Presence
+
         # Discord allows up to 10 IPC pipe slots (discord-ipc-0 ... discord-ipc-9).
         # Other presence apps (e.g. music players) may grab slot 0 first.
         # Iterate until we find a free pipe so we can co-exist with them.
@@ -24,6 +46,8 @@ class DiscordRPC:
                 self.rpc = Presence(self.application_id, pipe=pipe_id)
                 self.rpc.connect()
                 self._connected = True
+                self._ever_connected = True
+                self._last_update_hash = None  # a fresh connection has no activity yet
                 logger.info("Connected to Discord RPC on pipe %d", pipe_id)
                 return True
             except Exception as e:
@@ -42,58 +66,112 @@ class DiscordRPC:
                 pass
         self._connected = False
 
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def set_assets(self, assets_config: dict) -> None:
+        """New discord_assets; the next update is sent even if the state is the same."""
+        self.assets = assets_config
+        self._last_update_hash = None
+
     def ensure_connected(self) -> bool:
         if self._connected:
             return True
-        return self.connect()
+        dropped = self._ever_connected
+        if not self.connect():
+            return False
+        if dropped:
+            self._m_reconnects.inc()  # only reconnects that worked
+        return True
+
+    # -- Sink ------------------------------------------------------------------
+
+    def publish(self, payload: Payload) -> None:
+        self._last_data = payload.data
+        self.update(payload.data)
 
-    def update(self, state: GameState) -> None:
+    def tick(self) -> None:
+        # nothing changed for a while; only worth waking for a lost connection
+        if not self._connected and self._last_data is not None:
+            self.update(self._last_data)
+
+    def close(self) -> None:
+        self.disconnect()
+
+    def _dedupe_hit_rate(self) -> float | None:
+        updates = self._m_updates.value
+        return round(self._m_deduped.value / updates, 4) if updates else None
+
+    def update(self, data: dict) -> None:
+        """Send one payload (sinks.build_payload) as rich presence."""
         if not self.ensure_connected():
             return
 
-        presence = self._build_presence(state)
+        self._m_updates.inc()
+        tracer = tracing.get()
+        batch = tracer.current() if tracer else None
+        presence = self._build_presence(data)
+        if batch is not None:
+            batch.mark("payload")
         update_hash = str(presence)
         if update_hash == self._last_update_hash:
+            self._m_deduped.inc()
             return
         self._last_update_hash = update_hash
 
+        rpc_exceptions = lazy_import("pypresence").exceptions
+
+        t = time.perf_counter()
         try:
-            if state.phase == GamePhase.NOT_RUNNING:
+            if not presence:
                 self.rpc.clear()
             else:
                 self.rpc.update(**presence)
                 logger.debug("Presence: %s", presence)
+            self._m_sent.inc()
+            if batch is not None:
+                batch.mark("ipc_send")
         except rpc_exceptions.InvalidID:
             logger.error("Invalid Discord Application ID")
             self._connected = False
+            self._m_errors.inc()
         except (ConnectionError, BrokenPipeError):
             logger.warning("Discord connection lost")
             self._connected = False
+            self._m_errors.inc()
         except Exception as e:
             logger.error("RPC error: %s", e)
+            self._m_errors.inc()
+        finally:
+            self._m_send_latency.observe(time.perf_counter() - t)
 
-    def _build_presence(self, state: GameState) -> dict:
-        if state.phase == GamePhase.NOT_RUNNING:
+    def _build_presence(self, data: dict) -> dict:
+        phase = GamePhase[data["phase"]]
+        if phase == GamePhase.NOT_RUNNING:
             return {}
 
         logo = self.assets.get("logo", "deadlock_logo")
         logo_text = self.assets.get("logo_text", "Deadlock")
+        hero = data["hero_name"]
+        party_size = data["party_size"]
+        in_party = party_size > 1
 
         # Default layout:
         # Large image is the hero (or logo if no hero)
         p: dict = {
-            "large_image": state.hero_asset_name or logo,
+            "large_image": data["hero_asset"] or logo,
             "large_text": "Deadlock", # Keep main tooltip simple
         }
         
         # Add small image for the hero name to appear cleanly as a neat badge hover
-        if state.hero_display_name:
+        if hero:
             p["small_image"] = logo
-            p["small_text"] = state.hero_display_name
-        if state.in_party:
-            p["party_size"] = [state.party_size, PARTY_MAX]
+            p["small_text"] = hero
+        if in_party:
+            p["party_size"] = [party_size, PARTY_MAX]
 
-        match state.phase:
+        match phase:
             case GamePhase.MAIN_MENU:
                 p["details"] = "Main Menu"
                 p["large_image"] = logo
@@ -102,30 +180,29 @@ class DiscordRPC:
             case GamePhase.HIDEOUT:
                 # Use hero-specific hideout flavour text from the API when available
                 # e.g. "Mixing Drinks in the Hideout" for Infernus
-                p["details"] = state.hero_hideout_text
+                p["details"] = data["hideout_text"]
                 p["state"] = "Playing Solo (1 of 6)"
                 p.pop("small_image", None)
                 p.pop("small_text", None)
 
             case GamePhase.PARTY_HIDEOUT:
-                p["details"] = state.hero_hideout_text
-                p["state"] = f"Party of {state.party_size}"
+                p["details"] = data["hideout_text"]
+                p["state"] = f"Party of {party_size}"
                 p.pop("small_image", None)
                 p.pop("small_text", None)
 
             case GamePhase.IN_QUEUE:
                 p["details"] = "Looking for Match..."
-                if state.in_party:
-                    p["state"] = f"In Queue {state.party_size}"
-                # if state.hero_key:
+                if in_party:
+                    p["state"] = f"In Queue {party_size}"
+                # if hero:
                 #     p["small_text"] = "Searching"
 
             case GamePhase.MATCH_INTRO:
-                mode_str = state.mode_display()
-                hero = state.hero_display_name
-                if state.in_party:
+                mode_str = data["mode_display"]
+                if in_party:
                     p["details"] = f" {mode_str} · {hero}" if hero else f" {mode_str}"
-                    p["state"] = f"Party of {state.party_size}"
+                    p["state"] = f"Party of {party_size}"
                 elif hero:
                     p["details"] = f" {mode_str}"
                     p["state"] = f"Playing as {hero}"
@@ -133,18 +210,17 @@ class DiscordRPC:
                     p["details"] = f" {mode_str}"
 
             case GamePhase.IN_MATCH:
-                mode_str = state.mode_display()
-                hero = state.hero_display_name
-                if state.in_party:
+                mode_str = data["mode_display"]
+                if in_party:
                     p["details"] = f" {mode_str} · {hero}" if hero else f" {mode_str}"
-                    p["state"] = f"Party of {state.party_size}"
+                    p["state"] = f"Party of {party_size}"
                 elif hero:
                     p["details"] = f" {mode_str}"
                     p["state"] = f"Playing as {hero}"
                 else:
                     p["details"] = f" {mode_str}"
-                if state.match_start_time and state.match_mode not in (MatchMode.SANDBOX, MatchMode.TUTORIAL):
-                    p["start"] = int(state.match_start_time)
+                if data["match_start"] and data["mode"] not in (MatchMode.SANDBOX.name, MatchMode.TUTORIAL.name):
+                    p["start"] = int(data["match_start"])
 
             case GamePhase.POST_MATCH:
                 p["details"] = "Post-Match"
@@ -156,8 +232,20 @@ class DiscordRPC:
                 p.pop("small_image", None)
                 p.pop("small_text", None)
 
+        if "matches_today" in data:
+            self._add_history(p, data)
+
         # Stable session timestamp
-        if "start" not in p and state.session_start_time:
-            p["start"] = int(state.session_start_time)
+        if "start" not in p and data["session_start"]:
+            p["start"] = int(data["session_start"])
+
+        return {k: v for k, v in p.items() if v is not None}
+
+    def _add_history(self, p: dict, data: dict) -> None:
+        """Hover texts from match history: match count today, time on this hero."""
+        from history import ordinal
 
-        return {k: v for k, v in p.items() if v is not None}
\ No newline at end of file
+        p["large_text"] = f"{ordinal(data['matches_today'] + 1)} match today"
+        hero_seconds = data["hero_seconds"]
+        if hero_seconds and hero_seconds >= 3600 and "small_text" in p:
+            p["small_text"] = f"{p['small_text']} · {hero_seconds / 3600:.0f}h played"
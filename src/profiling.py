@@ -0,0 +1,133 @@
+"""
+Startup profiling, enabled by setting DEADLOCK_RPC_PROFILE=1.
+
+Records how long each deferred import and each init step takes, then logs a
+report once the watcher is up and a resident-memory sample once the app has
+settled (DEADLOCK_RPC_PROFILE_STEADY seconds later, default 60).
+When profiling is off every helper here is a thin pass-through.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Iterator
+
+ENABLED = os.environ.get("DEADLOCK_RPC_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+STEADY_STATE_DELAY = 60.0
+
+_T0 = time.perf_counter()
+_imports: list[tuple[str, float]] = []
+_steps: list[tuple[str, float]] = []
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first use, recording how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    t = time.perf_counter()
+    module = importlib.import_module(name)
+    if ENABLED:
+        _imports.append((name, time.perf_counter() - t))
+    return module
+
+
+@contextmanager
+def step(name: str) -> Iterator[None]:
+    """Time one init step."""
+    if not ENABLED:
+        yield
+        return
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps.append((name, time.perf_counter() - t))
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size of this process, or None if unavailable."""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        except Exception:
+            return None
+        return None
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS; it is the peak, not current.
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def _steady_state_delay() -> float:
+    """DEADLOCK_RPC_PROFILE_STEADY, read only when profiling; junk falls back to the default."""
+    raw = os.environ.get("DEADLOCK_RPC_PROFILE_STEADY", "").strip()
+    try:
+        return float(raw) if raw else STEADY_STATE_DELAY
+    except ValueError:
+        return STEADY_STATE_DELAY
+
+
+def _fmt_rss() -> str:
+    rss = rss_bytes()
+    return f"{rss / (1024 * 1024):.1f} MB" if rss is not None else "n/a"
+
+
+def report(logger: logging.Logger) -> None:
+    """Log the startup report and schedule the steady-state RSS sample."""
+    if not ENABLED:
+        return
+    logger.info("── startup profile ──")
+    for name, dt in _imports:
+        logger.info("  import %-22s %8.1f ms", name, dt * 1000)
+    for name, dt in _steps:
+        logger.info("  step   %-22s %8.1f ms", name, dt * 1000)
+    logger.info("  ready after %.1f ms, RSS %s", (time.perf_counter() - _T0) * 1000, _fmt_rss())
+
+    delay = _steady_state_delay()
+
+    def _steady() -> None:
+        logger.info("Steady-state RSS after %.0f s: %s", delay, _fmt_rss())
+
+    timer = threading.Timer(delay, _steady)
+    timer.daemon = True
+    timer.name = "profile-rss"
+    timer.start()
@@ -0,0 +1,186 @@
+"""
+Fixed-layout shared-memory state block with a seqlock, for local readers
+that sample state every frame (overlays) and shouldn't pay for a socket hop.
+
+Backing store: a file under /dev/shm (or the temp dir where there is no
+/dev/shm) mapped with mmap; on Windows, named shared memory
+("Local\\DeadlockRPCState"). Enabled with config "state_shm": true, or a
+path / tag name of your own.
+
+Layout, little-endian, 128 bytes:
+
+    off  size  field
+      0     4  magic "DLRS"
+      4     2  layout version (1)
+      6     2  block size (128)
+      8     8  seq, u64: odd while a write is in progress
+     16     8  state version, u64
+     24     8  match start, f64 epoch seconds (0 = none)
+     32     8  session start, f64 (0 = none)
+     40     8  last update, f64
+     48     1  party size, u8
+     49     1  flags: 1 = transformed, 2 = in match
+     50    14  reserved
+     64    16  phase name, ASCII, NUL padded (GamePhase, e.g. "IN_MATCH")
+     80    16  mode name (MatchMode, e.g. "UNRANKED")
+     96    32  hero codename, UTF-8, NUL padded (e.g. "inferno")
+
+Reading: load seq; if odd, retry; copy bytes 16..128; load seq again; if it
+changed, retry. read_block() does exactly that.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sinks import Payload, Sink
+
+if TYPE_CHECKING:
+    from game_state import GameSnapshot
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DLRS"
+LAYOUT_VERSION = 1
+SIZE = 128
+DEFAULT_NAME = "deadlock-rpc-state"
+WINDOWS_TAG = "Local\\DeadlockRPCState"
+
+_HEADER = struct.Struct("<4sHH")
+_SEQ = struct.Struct("<Q")
+_BODY = struct.Struct("<QdddBB14x16s16s32s")
+SEQ_OFFSET = 8
+BODY_OFFSET = 16
+
+FLAG_TRANSFORMED = 1
+FLAG_IN_MATCH = 2
+
+
+def default_path() -> Path:
+    shm = Path("/dev/shm")
+    return (shm if shm.is_dir() else Path(tempfile.gettempdir())) / DEFAULT_NAME
+
+
+def _pack(state: GameSnapshot) -> bytes:
+    flags = (FLAG_TRANSFORMED if state.is_transformed else 0) | (FLAG_IN_MATCH if state.is_in_match else 0)
+    return _BODY.pack(
+        state.version,
+        state.match_start_time or 0.0,
+        state.session_start_time or 0.0,
+        state.last_update or 0.0,
+        min(state.party_size, 255),
+        flags,
+        state.phase.name.encode("ascii")[:16],
+        state.match_mode.name.encode("ascii")[:16],
+        (state.hero_key or "").encode("utf-8")[:32],
+    )
+
+
+class SharedStateBlock:
+    """Writer side. Single writer only (the sink thread)."""
+
+    def __init__(self, name: str | None = None):
+        self.path: Path | None = None
+        if sys.platform == "win32":
+            self._file = None
+            self.name = name or WINDOWS_TAG
+            self.mm = mmap.mmap(-1, SIZE, tagname=self.name)
+        else:
+            self.path = Path(name) if name else default_path()
+            self.name = str(self.path)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            os.ftruncate(fd, SIZE)
+            self._file = fd
+            self.mm = mmap.mmap(fd, SIZE)
+        self._seq = 0
+        self.mm[:_HEADER.size] = _HEADER.pack(MAGIC, LAYOUT_VERSION, SIZE)
+        self.mm[SEQ_OFFSET:SEQ_OFFSET + 8] = _SEQ.pack(0)
+
+    def write(self, state: GameSnapshot) -> None:
+        body = _pack(state)
+        self._seq += 1  # odd: readers back off
+        self.mm[SEQ_OFFSET:SEQ_OFFSET + 8] = _SEQ.pack(self._seq)
+        self.mm[BODY_OFFSET:BODY_OFFSET + len(body)] = body
+        self._seq += 1
+        self.mm[SEQ_OFFSET:SEQ_OFFSET + 8] = _SEQ.pack(self._seq)
+
+    def close(self) -> None:
+        self.mm.close()
+        if self._file is not None:
+            os.close(self._file)
+            self.path.unlink(missing_ok=True)
+
+
+def read_block(mm: mmap.mmap | bytes, retries: int = 1000) -> dict | None:
+    """Consistent read of a block (reference reader); None if it never settles."""
+    if bytes(mm[:4]) != MAGIC:
+        return None
+    for _ in range(retries):
+        (seq,) = _SEQ.unpack_from(mm, SEQ_OFFSET)
+        if seq & 1:
+            continue
+        body = bytes(mm[BODY_OFFSET:BODY_OFFSET + _BODY.size])
+        (again,) = _SEQ.unpack_from(mm, SEQ_OFFSET)
+        if again != seq:
+            continue
+        version, match_start, session_start, updated, party, flags, phase, mode, hero = _BODY.unpack(body)
+        return {
+            "version": version,
+            "phase": phase.rstrip(b"\0").decode("ascii"),
+            "mode": mode.rstrip(b"\0").decode("ascii"),
+            "hero": hero.rstrip(b"\0").decode("utf-8", errors="replace") or None,
+            "party_size": party,
+            "transformed": bool(flags & FLAG_TRANSFORMED),
+            "in_match": bool(flags & FLAG_IN_MATCH),
+            "match_start": match_start or None,
+            "session_start": session_start or None,
+            "updated": updated,
+        }
+    return None
+
+
+class SharedMemorySink(Sink):
+    """Writes every published state into the shared block."""
+
+    name = "shm"
+
+    def __init__(self, name: str | None = None):
+        self._name = name
+        self.block: SharedStateBlock | None = None
+
+    def start(self) -> None:
+        self.block = SharedStateBlock(self._name)
+        logger.info("State block at %s", self.block.name)
+
+    def publish(self, payload: Payload) -> None:
+        self.block.write(payload.snapshot)
+
+    def close(self) -> None:
+        if self.block is not None:
+            self.block.close()
+
+
+if __name__ == "__main__":
+    # python shm_state.py [path]  - print the block whenever it changes
+    import json
+    import time
+
+    if sys.platform == "win32":
+        mm = mmap.mmap(-1, SIZE, tagname=sys.argv[1] if len(sys.argv) > 1 else WINDOWS_TAG)
+    else:
+        with open(sys.argv[1] if len(sys.argv) > 1 else default_path(), "rb") as f:
+            mm = mmap.mmap(f.fileno(), SIZE, access=mmap.ACCESS_READ)
+    last = None
+    while True:
+        state = read_block(mm)
+        if state and state["version"] != last:
+            last = state["version"]
+            print(json.dumps(state))
+        time.sleep(0.05)
@@ -0,0 +1,440 @@
+"""
+Presence fan-out: one state payload, many outputs.
+
+Fanout subscribes to the event bus once, builds a Payload per state version
+(a plain dict plus its JSON encoding, computed once) and hands it to every
+sink. Each sink runs on its own thread with a one-slot mailbox, so a slow
+sink only ever skips to the newest payload and never delays the others.
+
+Sinks:
+    DiscordRPC     (presence.py) Discord rich presence
+    JsonFileSink   config "state_file": the payload, atomically replaced on change
+    StreamSink     config "state_socket": line-delimited JSON to every connected
+                   client; a Unix socket path, or "tcp:PORT" on 127.0.0.1
+                   (the fallback on Windows, which has no AF_UNIX servers here)
+    HttpSink       config "state_port": GET /state on 127.0.0.1, with ETag /
+                   If-None-Match, long-polling (?wait=N) and SSE (/events)
+    SharedMemorySink  (shm_state.py) config "state_shm": fixed-layout seqlock block
+"""
+
+from __future__ import annotations
+
+import abc
+import json
+import logging
+import os
+import socket
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import metrics
+from game_state import GamePhase
+
+if TYPE_CHECKING:
+    from events import EventBus, Transition
+    from game_state import GameSnapshot
+    from history import MatchHistory
+    from tracing import Batch, Tracer
+
+logger = logging.getLogger(__name__)
+
+
+class Payload:
+    """Everything an output needs for one state version."""
+
+    __slots__ = ("version", "snapshot", "data", "json", "batch")
+
+    def __init__(self, snapshot: GameSnapshot, batch: Batch | None = None, history: MatchHistory | None = None):
+        self.version = snapshot.version
+        self.snapshot = snapshot
+        self.batch = batch
+        self.data = build_payload(snapshot, history)
+        self.json = json.dumps(self.data, separators=(",", ":")).encode()
+
+
+def build_payload(state: GameSnapshot, history: MatchHistory | None = None) -> dict:
+    data = {
+        "version": state.version,
+        "phase": state.phase.name,
+        "hero": state.hero_key,
+        "hero_name": state.hero_display_name,
+        "hero_asset": state.hero_asset_name,
+        "transformed": state.is_transformed,
+        "in_match": state.is_in_match,
+        "mode": state.match_mode.name,
+        "mode_display": state.mode_display() if state.is_in_match else None,
+        "map": state.map_name,
+        "party_size": state.party_size,
+        "player_count": state.player_count,
+        "bot_difficulty": state.bot_difficulty,
+        "match_start": state.match_start_time,
+        "queue_start": state.queue_start_time,
+        "session_start": state.session_start_time,
+        "updated": state.last_update,
+        "hideout_text": state.hero_hideout_text if state.phase in (GamePhase.HIDEOUT, GamePhase.PARTY_HIDEOUT) else None,
+    }
+    if history is not None and state.is_in_match:
+        data.update(_history_fields(state, history))
+    return data
+
+
+def _history_fields(state: GameSnapshot, history: MatchHistory) -> dict:
+    """Match count today and time on this hero, queried once per state version."""
+    from history import start_of_day
+
+    try:
+        return {
+            "matches_today": history.matches_since(start_of_day(state.clock.time())),
+            "hero_seconds": history.hero_seconds(state.hero_key) if state.hero_key else 0,
+        }
+    except Exception as e:
+        logger.debug("History query failed: %s", e)
+        return {}
+
+
+class Sink(abc.ABC):
+    """Output for presence payloads. publish() runs on the sink's own thread."""
+
+    name = "sink"
+    # the sink whose publish() completes a traced transition (Discord)
+    traced = False
+
+    def start(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def publish(self, payload: Payload) -> None:
+        ...
+
+    def tick(self) -> None:
+        """Called when nothing was published for a while."""
+
+    def close(self) -> None:
+        pass
+
+
+class _Worker:
+    def __init__(self, sink: Sink, idle: Callable[[], float], tracer: Tracer | None):
+        self.sink = sink
+        self.idle = idle
+        self.tracer = tracer
+        self._latest: Payload | None = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._m_published = metrics.counter(f"sink.{sink.name}.published")
+        self._m_skipped = metrics.counter(f"sink.{sink.name}.skipped")
+        self._m_errors = metrics.counter(f"sink.{sink.name}.errors")
+        self.thread = threading.Thread(target=self._loop, daemon=True, name=f"sink-{sink.name}")
+
+    def offer(self, payload: Payload) -> None:
+        with self._cond:
+            superseded, self._latest = self._latest, payload
+            self._cond.notify()
+        if superseded is not None:
+            self._m_skipped.inc()
+            if superseded.batch is not None and self.sink.traced and self.tracer:
+                self.tracer.drop_batch(superseded.batch)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                if self._latest is None and not self._closed:
+                    self._cond.wait(self.idle())
+                if self._closed:
+                    return
+                payload, self._latest = self._latest, None
+            batch = payload.batch if payload is not None and self.sink.traced and self.tracer else None
+            try:
+                if payload is None:
+                    self.sink.tick()
+                    continue
+                if batch is not None:
+                    self.tracer.set_current(batch)
+                self.sink.publish(payload)
+                self._m_published.inc()
+            except Exception as e:
+                self._m_errors.inc()
+                logger.error("%s sink error: %s", self.sink.name, e)
+            finally:
+                if batch is not None:
+                    self.tracer.set_current(None)
+                    self.tracer.finish_batch(batch)
+
+
+class Fanout:
+    def __init__(self, bus: EventBus, idle_interval: Callable[[], float] = lambda: 5.0,
+                 tracer: Tracer | None = None, history: MatchHistory | None = None):
+        self.bus = bus
+        self.idle_interval = idle_interval
+        self.tracer = tracer
+        # match history for the "3rd match today" fields, queried once per payload
+        self.history = history
+        self._workers: list[_Worker] = []
+        self._version = -1
+
+    def add(self, sink: Sink) -> None:
+        self._workers.append(_Worker(sink, self.idle_interval, self.tracer))
+
+    def start(self, initial: GameSnapshot | None = None) -> None:
+        for w in self._workers:
+            try:
+                w.sink.start()
+            except Exception as e:
+                logger.warning("%s sink unavailable: %s", w.sink.name, e)
+                continue
+            w.thread.start()
+        self._workers = [w for w in self._workers if w.thread.is_alive()]
+        if initial is not None:
+            self._fan_out(Payload(initial, history=self.history))
+        self.bus.run("sinks", self._on_event, maxsize=1, on_drop=self._drop)
+
+    def _on_event(self, event: Transition) -> None:
+        if event.snapshot.version == self._version:
+            self._drop(event)
+            return
+        self._fan_out(Payload(event.snapshot, event.batch, self.history))
+
+    def _drop(self, event: Transition) -> None:
+        # keep overtaken transitions in the trace instead of losing their batch
+        if event.batch is not None and self.tracer is not None:
+            self.tracer.drop_batch(event.batch)
+
+    def refresh(self, snapshot: GameSnapshot, sink: Sink | None = None) -> None:
+        """Offer the current state again (to one sink, or all), e.g. after its settings changed."""
+        payload = Payload(snapshot, history=self.history)
+        for w in self._workers:
+            if sink is None or w.sink is sink:
+                w.offer(payload)
+
+    def _fan_out(self, payload: Payload) -> None:
+        self._version = payload.version
+        for w in self._workers:
+            w.offer(payload)
+
+    def close(self) -> None:
+        for w in self._workers:
+            w.close()
+            w.thread.join(timeout=2)
+            try:
+                w.sink.close()
+            except Exception as e:
+                logger.debug("%s sink close: %s", w.sink.name, e)
+
+
+# ── built-in sinks ────────────────────────────────────────────────────────────
+
+class JsonFileSink(Sink):
+    name = "file"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def publish(self, payload: Payload) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(payload.json)
+        os.replace(tmp, self.path)
+
+
+class StreamSink(Sink):
+    """Line-delimited JSON to every connected client; new clients get the current state first."""
+
+    name = "stream"
+    SEND_TIMEOUT = 0.5
+
+    def __init__(self, address: str):
+        self.address = address
+        self._server: socket.socket | None = None
+        self._clients: list[socket.socket] = []
+        self._lock = threading.Lock()
+        self._last: bytes | None = None
+        self._unix_path: Path | None = None
+
+    def start(self) -> None:
+        if self.address.startswith("tcp:"):
+            server = socket.create_server(("127.0.0.1", int(self.address[4:])))
+            where = f"127.0.0.1:{server.getsockname()[1]}"
+        elif hasattr(socket, "AF_UNIX"):
+            self._unix_path = Path(self.address)
+            _unlink_socket(self._unix_path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(str(self._unix_path))
+            server.listen()
+            where = str(self._unix_path)
+        else:
+            raise OSError("Unix sockets unavailable; use state_socket \"tcp:PORT\"")
+        self._server = server
+        threading.Thread(target=self._accept_loop, daemon=True, name="sink-stream-accept").start()
+        logger.info("State stream at %s", where)
+
+    def _accept_loop(self) -> None:
+        while self._server is not None:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            client.settimeout(self.SEND_TIMEOUT)
+            with self._lock:
+                if self._last is not None and not self._send(client, self._last):
+                    continue
+                self._clients.append(client)
+
+    def _send(self, client: socket.socket, line: bytes) -> bool:
+        try:
+            client.sendall(line)
+            return True
+        except OSError:
+            client.close()
+            return False
+
+    def publish(self, payload: Payload) -> None:
+        line = payload.json + b"\n"
+        with self._lock:
+            self._last = line
+            self._clients = [c for c in self._clients if self._send(c, line)]
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+        with self._lock:
+            for c in self._clients:
+                c.close()
+            self._clients = []
+        if self._unix_path is not None:
+            _unlink_socket(self._unix_path)
+
+
+def _unlink_socket(path: Path) -> None:
+    """Remove a stale Unix socket; anything else at that path is left alone (bind then fails)."""
+    try:
+        if stat.S_ISSOCK(path.stat().st_mode):
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class HttpSink(Sink):
+    """Loopback HTTP state API.
+
+    GET /state            current payload, ETag = boot id + state version;
+                          If-None-Match with the current tag -> 304
+    GET /state?wait=N     long-poll: with If-None-Match, holds the request
+                          until the state changes (200) or N seconds pass (304)
+    GET /events           server-sent events, one "state" event per change
+    """
+
+    name = "http"
+    MAX_WAIT = 60.0
+    HEARTBEAT = 15.0
+
+    def __init__(self, port: int):
+        self.port = port
+        self._boot = format(int(time.time()), "x")
+        self._etag = f'"{self._boot}-0"'
+        self._body = b"{}"
+        self._cond = threading.Condition()
+        self._closed = False
+        self._server = None
+
+    def current(self) -> tuple[str, bytes]:
+        with self._cond:
+            return self._etag, self._body
+
+    def wait_change(self, etag: str | None, timeout: float) -> tuple[str, bytes]:
+        """Current (etag, body) once it differs from etag, or as-is after timeout."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._etag != etag or self._closed, timeout)
+            return self._etag, self._body
+
+    def start(self) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs
+
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path, _, query = self.path.partition("?")
+                if path in ("/", "/state"):
+                    self._state(parse_qs(query))
+                elif path == "/events":
+                    self._events()
+                else:
+                    self.send_error(404)
+
+            def _headers(self, status: int, etag: str, content_type: str = "application/json") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Access-Control-Allow-Origin", "*")  # browser-source overlays
+                self.send_header("Access-Control-Expose-Headers", "ETag")
+
+            def _state(self, params: dict) -> None:
+                seen = self.headers.get("If-None-Match")
+                try:
+                    wait = min(float(params.get("wait", ["0"])[0]), sink.MAX_WAIT)
+                except ValueError:
+                    self.send_error(400, "wait must be a number of seconds")
+                    return
+                etag, body = sink.current()
+                if wait > 0 and seen == etag:
+                    etag, body = sink.wait_change(etag, wait)
+                if seen == etag:
+                    self._headers(304, etag)
+                    self.end_headers()
+                    return
+                self._headers(200, etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _events(self) -> None:
+                etag = self.headers.get("Last-Event-ID")
+                etag = f'"{etag}"' if etag else None
+                self._headers(200, sink.current()[0], "text/event-stream")
+                self.end_headers()
+                try:
+                    while not sink._closed:
+                        new_etag, body = sink.wait_change(etag, sink.HEARTBEAT)
+                        if new_etag == etag:
+                            self.wfile.write(b": keepalive\n\n")
+                        else:
+                            etag = new_etag
+                            self.wfile.write(b"id: " + etag.strip('"').encode() + b"\nevent: state\ndata: " + body + b"\n\n")
+                        self.wfile.flush()
+                except OSError:
+                    pass  # client went away
+
+            def log_message(self, format, *args) -> None:
+                logger.debug("state %s", format % args)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="sink-http").start()
+        logger.info("State at http://127.0.0.1:%d/state", self._server.server_address[1])
+
+    def publish(self, payload: Payload) -> None:
+        with self._cond:
+            self._etag = f'"{self._boot}-{payload.version}"'
+            self._body = payload.json
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,318 @@
+"""
+Soak test: run the real LogWatcher against a console.log that keeps growing.
+
+A writer thread appends a recorded log (looped) or a synthetic session stream
+to a temp file at a steady rate, with periodic bursts of map-load spam,
+truncation, and game restarts (file deleted and re-created while the game
+"process" is briefly gone; is_game_running is driven by the harness). The
+watcher runs exactly as in the app, in its own thread with the configured
+poll interval.
+
+Reported: processing lag for lines that change state (write -> processed),
+missed and late transitions, CPU seconds per thread and RSS over time.
+
+    python soak.py --duration 3600 --rate 200 --burst-every 120 --truncate-every 900
+    python soak.py --log archived_console.log --duration 600
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterator
+
+from game_state import GameState
+from console_log import LogWatcher, lines_from
+import profiling
+
+HEROES = ("inferno", "hornet", "geist", "werewolf", "haze", "dynamo")
+
+
+def synthetic_lines(seed: int = 1) -> Iterator[str]:
+    """Endless hideout -> queue -> match -> hideout sessions with filler noise."""
+    rng = random.Random(seed)
+    for n in itertools.count():
+        hero = HEROES[n % len(HEROES)]
+        yield '[Client] Map: "dl_hideout"'
+        yield "[HostStateManager] Host activate: Loading (dl_hideout)"
+        yield f"[Server] Loaded hero 1/hero_{hero}"
+        yield "[Client] CL:  Connected to 'loopback' [U:1:12345]"
+        yield "[GCClient] Send msg 9010 (k_EMsgClientToGCStartMatchmaking)"
+        for i in range(rng.randint(10, 40)):
+            yield f"[Noise] queue tick {i} {rng.randint(0, 10**6)}"
+        yield f"Lobby {n % 50} for Match {n % 50 + 1000} created"
+        yield "[Client] CL:  Connected to '10.0.0.1:27015'"
+        yield '[Client] Map: "dl_midtown"'
+        yield "[Client] Players: 12 (6 bots) / 12 humans"
+        yield f"VMDL Camera Pose Success! models/heroes_staging/{hero}/{hero}.vmdl"
+        yield "ChangeGameState: GameInProgress (7)"
+        for i in range(rng.randint(100, 400)):
+            yield f"[Noise] ent {rng.randint(0, 10**6)} think {i}"
+        yield "ChangeGameState: PostGame (6)"
+        yield f"Lobby {n % 50} for Match {n % 50 + 1000} destroyed"
+        yield "[Client] Disconnecting from server: NETWORK_DISCONNECT_SHUTDOWN"
+
+
+def recorded_lines(path: Path) -> Iterator[str]:
+    while True:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if line:
+                    yield line
+
+
+def burst_lines(rng: random.Random, count: int) -> list[str]:
+    """Map-load spam: lots of lines no pattern cares about."""
+    return [f"[ResourceSystem] Precaching material materials/dev/{rng.randint(0, 10**9)}.vmat" for _ in range(count)]
+
+
+def transition_texts(lines: list[str], config: dict) -> set[str]:
+    """Texts of lines that change state when this sample is replayed offline."""
+    from parser import make_watcher
+
+    watcher = make_watcher("<soak>", config)
+    return {event.text for event, changed in watcher.fold(watcher.events(lines_from(lines))) if changed}
+
+
+class SoakWatcher(LogWatcher):
+    """The real watcher, with the game process replaced by a harness flag."""
+
+    def __init__(self, harness: "Soak", **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.harness = harness
+
+    def is_game_running(self) -> bool:
+        # called once per poll iteration on the watcher thread; a cheap place
+        # for the thread to report its own CPU time
+        self.harness.cpu["watcher"] = time.thread_time()
+        return self.harness.game_running
+
+    def apply_event(self, event) -> bool:
+        changed = super().apply_event(event)
+        self.harness.on_processed(event.text)
+        return changed
+
+
+class Soak:
+    def __init__(self, args: argparse.Namespace, config: dict) -> None:
+        self.args = args
+        self.config = config
+        self.rng = random.Random(args.seed)
+        self.dir = Path(tempfile.mkdtemp(prefix="deadlock-soak-"))
+        self.log_path = self.dir / "console.log"
+        self.log_path.touch()
+
+        self.game_running = True
+        self.cpu: dict[str, float] = {}
+        self.rss: list[tuple[float, int]] = []
+        self.counts = {"lines": 0, "bursts": 0, "truncations": 0, "restarts": 0}
+
+        source = recorded_lines(Path(args.log)) if args.log else synthetic_lines(args.seed)
+        sample = list(itertools.islice(source, 20000))
+        self.source = itertools.chain(sample, source)
+        self.watched = transition_texts(sample, config)
+
+        self._lock = threading.Lock()
+        self._pending: dict[str, deque[float]] = {}
+        self.lags: list[float] = []
+        self.expected = 0
+        self._stop = threading.Event()
+
+    # -- bookkeeping (writer and watcher threads) ---------------------------
+
+    def on_written(self, line: str, t: float) -> None:
+        if line in self.watched:
+            with self._lock:
+                self._pending.setdefault(line, deque()).append(t)
+                self.expected += 1
+
+    def on_processed(self, line: str) -> None:
+        if line not in self.watched:
+            return
+        with self._lock:
+            pending = self._pending.get(line)
+            if pending:
+                self.lags.append(time.perf_counter() - pending.popleft())
+
+    def _forget_pending(self) -> int:
+        """Drop lines deleted with the log (restart) or cut by a truncation; they may never be read."""
+        with self._lock:
+            lost = sum(len(q) for q in self._pending.values())
+            self._pending.clear()
+            self.expected -= lost
+            return lost
+
+    # -- writer -------------------------------------------------------------
+
+    def _write(self, f, lines: list[str]) -> None:
+        t = time.perf_counter()
+        f.write("".join(line + "\n" for line in lines))
+        f.flush()
+        for line in lines:
+            self.on_written(line, t)
+        self.counts["lines"] += len(lines)
+
+    def writer(self) -> None:
+        a = self.args
+        interval = 1.0 / a.rate
+        start = time.perf_counter()
+        next_burst = a.burst_every or float("inf")
+        next_truncate = a.truncate_every or float("inf")
+        next_restart = a.restart_every or float("inf")
+        f = open(self.log_path, "a", encoding="utf-8")
+        try:
+            while not self._stop.is_set():
+                elapsed = time.perf_counter() - start
+                if elapsed >= a.duration:
+                    break
+                if elapsed >= next_burst:
+                    self._write(f, burst_lines(self.rng, a.burst_lines))
+                    self.counts["bursts"] += 1
+                    next_burst += a.burst_every
+                if elapsed >= next_truncate:
+                    f.truncate(0)
+                    f.seek(0)
+                    self._forget_pending()
+                    self.counts["truncations"] += 1
+                    next_truncate += a.truncate_every
+                if elapsed >= next_restart:
+                    # game exits: process gone, log deleted, then a fresh launch
+                    self.game_running = False
+                    f.close()
+                    time.sleep(a.poll_interval * 4)
+                    self.log_path.unlink(missing_ok=True)
+                    self._forget_pending()
+                    f = open(self.log_path, "a", encoding="utf-8")
+                    self.game_running = True
+                    self.counts["restarts"] += 1
+                    next_restart += a.restart_every
+                self._write(f, [next(self.source)])
+                self.cpu["writer"] = time.thread_time()
+                time.sleep(interval)
+        finally:
+            f.close()
+
+    # -- run ----------------------------------------------------------------
+
+    def run(self) -> dict:
+        a = self.args
+        state = GameState()
+        watcher = SoakWatcher(
+            self,
+            log_path=self.log_path,
+            state=state,
+            patterns=self.config.get("log_patterns", {}),
+            map_to_mode=self.config.get("map_to_mode", {}),
+            hideout_maps=self.config.get("hideout_maps", ["dl_hideout"]),
+            process_names=[],
+            resync_max_bytes=self.config.get("resync_max_bytes", 100 * 1024),
+        )
+        watcher_thread = threading.Thread(
+            target=watcher.start, kwargs={"poll_interval": a.poll_interval}, daemon=True, name="log-watcher",
+        )
+        writer_thread = threading.Thread(target=self.writer, daemon=True, name="soak-writer")
+
+        watcher_thread.start()
+        time.sleep(a.poll_interval * 2)  # let the watcher detect the "game" first
+        start = time.perf_counter()
+        writer_thread.start()
+
+        next_report = a.report_every
+        while writer_thread.is_alive():
+            time.sleep(1)
+            elapsed = time.perf_counter() - start
+            rss = profiling.rss_bytes()
+            if rss is not None:
+                self.rss.append((elapsed, rss))
+            if elapsed >= next_report:
+                print(f"[{elapsed:7.0f}s] lines {self.counts['lines']:>9}  "
+                      f"transitions {len(self.lags):>6}/{self.expected:<6} "
+                      f"RSS {rss / 2**20 if rss else 0:.1f} MB")
+                next_report += a.report_every
+
+        time.sleep(a.poll_interval * 3)  # grace period for the last batch
+        wall = time.perf_counter() - start
+        watcher.stop()
+        self.cpu["main"] = time.thread_time()
+        return self.report(wall)
+
+    def report(self, wall: float) -> dict:
+        late_threshold = self.args.late_ms / 1000
+        with self._lock:
+            missed = sum(len(q) for q in self._pending.values())
+        lags = sorted(self.lags)
+
+        def pct(q: float) -> float:
+            return round(lags[min(len(lags) - 1, int(q * len(lags)))] * 1000, 1)
+
+        return {
+            "wall_seconds": round(wall, 1),
+            **self.counts,
+            "lines_per_second": round(self.counts["lines"] / wall, 1) if wall else None,
+            "transitions_expected": self.expected,
+            "transitions_seen": len(lags),
+            "transitions_missed": missed,
+            "transitions_late": sum(1 for x in lags if x > late_threshold),
+            "lag_ms": {
+                "p50": pct(0.50),
+                "p90": pct(0.90),
+                "p99": pct(0.99),
+                "max": round(lags[-1] * 1000, 1),
+                "mean": round(statistics.mean(lags) * 1000, 1),
+            } if lags else None,
+            "cpu_seconds": {name: round(t, 3) for name, t in self.cpu.items()},
+            "cpu_percent_of_wall": {name: round(100 * t / wall, 2) for name, t in self.cpu.items()} if wall else {},
+            "rss_mb": {
+                "min": round(min(r for _, r in self.rss) / 2**20, 1),
+                "max": round(max(r for _, r in self.rss) / 2**20, 1),
+                "last": round(self.rss[-1][1] / 2**20, 1),
+                "samples": [(round(t), round(r / 2**20, 1)) for t, r in self.rss[:: max(1, len(self.rss) // 20)]],
+            } if self.rss else None,
+        }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Soak-test LogWatcher against a growing console.log")
+    ap.add_argument("--log", help="recorded console.log to replay in a loop (default: synthetic sessions)")
+    ap.add_argument("--config", default=str(Path(__file__).parent / "config.json"))
+    ap.add_argument("--duration", type=float, default=60, help="seconds to write for")
+    ap.add_argument("--rate", type=float, default=100, help="lines per second")
+    ap.add_argument("--burst-every", type=float, default=30, help="seconds between map-load bursts (0 = off)")
+    ap.add_argument("--burst-lines", type=int, default=5000)
+    ap.add_argument("--truncate-every", type=float, default=0, help="seconds between truncations (0 = off)")
+    ap.add_argument("--restart-every", type=float, default=0, help="seconds between game restarts (0 = off)")
+    ap.add_argument("--poll-interval", type=float, default=1.0, help="watcher poll interval, as in the app")
+    ap.add_argument("--late-ms", type=float, default=2500, help="lag above which a transition counts as late")
+    ap.add_argument("--report-every", type=float, default=60)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="also write the report here")
+    args = ap.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    soak = Soak(args, config)
+    print(f"Soaking {soak.log_path} for {args.duration:.0f}s at {args.rate:.0f} lines/s")
+    report = soak.run()
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    try:
+        os.remove(soak.log_path)
+        soak.dir.rmdir()
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Track many stations' console.logs from one process (LAN centers).
+
+Every station gets its own LogWatcher and GameState, but they all share one
+compiled PatternEngine and the process-wide HeroDataStore, and a single
+thread drives them: each watcher's step() runs when it is due, so N stations
+cost N open files and N small states, not N threads. The logs usually sit on
+shares or synced folders, where change notifications don't arrive reliably,
+so due watchers just stat their log; with nothing appended that's all a step
+costs.
+
+A station counts as running while its log was written in the last
+idle_timeout seconds (the game process is on another machine, so there is
+nothing to probe). Each state change is written to <out>/<station>.json
+(same payload as the state_file sink) and <out>/stations.json holds all of
+them.
+
+config.json:
+    "stations": {"pc01": "//lan/pc01/game/citadel/console.log", ...},
+    "stations_out": "stations",
+    "station_idle_timeout": 60
+
+    python stations.py [--config config.json] [--out DIR] [--poll 1.0]
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+import metrics
+from clock import SYSTEM_CLOCK, Clock, SimulatedClock
+from console_log import LogWatcher, compile_engine
+from game_state import GameSnapshot, GameState
+from sinks import build_payload
+
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT = 60.0
+
+
+def log_alive(path: Path, idle_timeout: float, clock: Clock = SYSTEM_CLOCK) -> Callable[[], bool]:
+    """Liveness from the log itself: written to within idle_timeout seconds."""
+    def alive() -> bool:
+        try:
+            return clock.time() - os.stat(path).st_mtime < idle_timeout
+        except OSError:
+            return False
+    return alive
+
+
+class StationHost:
+    def __init__(
+        self,
+        stations: dict[str, str | Path],
+        config: dict,
+        out_dir: str | Path,
+        poll_interval: float = 1.0,
+        idle_timeout: float = IDLE_TIMEOUT,
+        index_dir: str | Path | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        self.out_dir = Path(out_dir)
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._stop = threading.Event()
+        self.snapshots: dict[str, GameSnapshot] = {}
+
+        engine = compile_engine(
+            config.get("log_patterns", {}),
+            config.get("hideout_maps", ["dl_hideout"]),
+            config.get("map_to_mode", {}),
+            registry=metrics.OFFLINE,
+        )
+        self.watchers: dict[str, LogWatcher] = {}
+        for name, log_path in stations.items():
+            log_path = Path(log_path)
+            self.watchers[name] = LogWatcher(
+                log_path=log_path,
+                state=GameState(clock=clock),
+                patterns={}, hideout_maps=[], process_names=[],
+                resync_max_bytes=config.get("resync_max_bytes", 100 * 1024),
+                engine=engine,
+                clock=clock,
+                liveness=log_alive(log_path, idle_timeout, clock),
+                index_path=Path(index_dir) / f"{name}.idx" if index_dir else None,
+                on_state_change=lambda snapshot, name=name: self._changed(name, snapshot),
+                registry=metrics.OFFLINE,
+            )
+
+    def _changed(self, name: str, snapshot: GameSnapshot) -> None:
+        self.snapshots[name] = snapshot
+        self._write(f"{name}.json", build_payload(snapshot))
+        self._write("stations.json", {n: build_payload(s) for n, s in sorted(self.snapshots.items())})
+        logger.info("%s: %s%s", name, snapshot.phase.name,
+                    f" ({snapshot.hero_key})" if snapshot.hero_key else "")
+
+    def _write(self, filename: str, data: dict) -> None:
+        path = self.out_dir / filename
+        tmp = path.with_name(filename + ".tmp")
+        try:
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error("Could not write %s: %s", path, e)
+
+    def run(self) -> None:
+        """Blocking loop: step whichever watcher is due next."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        logger.info("Watching %d stations", len(self.watchers))
+        # (due, tiebreak, name); stations start staggered over one interval
+        n = max(1, len(self.watchers))
+        now = self.clock.time()
+        order = itertools.count()
+        due = [(now + self.poll_interval * i / n, next(order), name) for i, name in enumerate(self.watchers)]
+        heapq.heapify(due)
+        # a SimulatedClock only moves when slept on; real time passes by itself and
+        # waiting on the event lets stop() cut the wait short
+        simulated = isinstance(self.clock, SimulatedClock)
+        while due and not self._stop.is_set():
+            when, _, name = due[0]
+            wait = when - self.clock.time()
+            if wait > 0:
+                if simulated:
+                    self.clock.sleep(wait)
+                else:
+                    self._stop.wait(wait)
+                continue
+            watcher = self.watchers[name]
+            try:
+                delay = watcher.step(self.poll_interval)
+            except Exception as e:
+                logger.error("%s: %s", name, e)
+                delay = self.poll_interval * 3
+            heapq.heapreplace(due, (self.clock.time() + delay, next(order), name))
+
+    def stop(self) -> None:
+        self._stop.set()
+        for watcher in self.watchers.values():
+            watcher.stop()
+
+
+def main() -> None:
+    import argparse
+
+    import app_logging
+
+    ap = argparse.ArgumentParser(description="Track many stations' console.logs from one process")
+    ap.add_argument("--config", default=str(Path(__file__).parent / "config.json"))
+    ap.add_argument("--out", default=None, help="directory for the per-station JSON files")
+    ap.add_argument("--poll", type=float, default=1.0, help="seconds between checks of each log")
+    args = ap.parse_args()
+
+    here = Path(__file__).parent
+    with open(args.config) as f:
+        config = json.load(f)
+    stations = config.get("stations") or {}
+    if not stations:
+        raise SystemExit('No "stations" in config')
+    app_logging.setup(here / "stations.log")
+
+    # one hero table for every station
+    import game_state
+    from hero_data import HeroDataStore
+
+    store = HeroDataStore(cache_dir=here / "cache")
+    store.load()
+    game_state.set_hero_store(store)
+
+    index_dir = here / "cache" / "stations" if config.get("log_index", True) else None
+    if index_dir is not None:
+        index_dir.mkdir(parents=True, exist_ok=True)
+    host = StationHost(
+        stations, config,
+        out_dir=args.out or here / config.get("stations_out", "stations"),
+        poll_interval=args.poll,
+        idle_timeout=config.get("station_idle_timeout", IDLE_TIMEOUT),
+        index_dir=index_dir,
+    )
+    try:
+        host.run()
+    except KeyboardInterrupt:
+        host.stop()
+    finally:
+        app_logging.shutdown()
+
+
+if __name__ == "__main__":
+    main()
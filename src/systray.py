@@ -2,10 +2,10 @@ import logging
 import os
 import platform
 import sys
-import threading
-import time
 from pathlib import Path
 
+from profiling import lazy_import
+
 logger = logging.getLogger("deadlock-rpc")
 
 def _bundle_dir() -> Path:
@@ -13,11 +13,21 @@ def _bundle_dir() -> Path:
     meipass = getattr(sys, "_MEIPASS", None)
     return Path(meipass) if meipass else Path(__file__).parent
 
+def _open_file(path: Path) -> None:
+    """Open a file with the platform's default application."""
+    if platform.system() == "Windows":
+        os.startfile(str(path))
+    elif platform.system() == "Darwin":
+        os.system(f'open "{path}"')
+    else:
+        os.system(f'xdg-open "{path}"')
+
 def create_tray_icon(app):
     """Create and run the system tray icon."""
     try:
-        import pystray
-        from PIL import Image
+        # the heaviest imports of a start; lazy_import puts them in the profile
+        pystray = lazy_import("pystray")
+        Image = lazy_import("PIL.Image")
     except ImportError:
         logger.warning(
             "pystray or Pillow not installed. Install with: pip install pystray Pillow"
@@ -33,9 +43,10 @@ def create_tray_icon(app):
         image = Image.new("RGB", (64, 64), color=(139, 92, 246))  # purple square
 
     def get_status_text():
-        phase = app.state.phase.name.replace("_", " ").title()
-        hero = app.state.hero_display_name or "None"
-        mode = app.state.mode_display() if app.state.is_in_match else "—"
+        state = app.snapshot
+        phase = state.phase.name.replace("_", " ").title()
+        hero = state.hero_display_name or "None"
+        mode = state.mode_display() if state.is_in_match else "—"
         return f"Phase: {phase}\nHero: {hero}\nMode: {mode}"
 
     def on_status(icon, item):
@@ -46,18 +57,27 @@ def create_tray_icon(app):
         except Exception:
             logger.info("Status:\n%s", status)
 
+    def on_metrics(icon, item):
+        """Write a metrics snapshot next to the log and open it."""
+        import metrics
+
+        meipass = getattr(sys, "_MEIPASS", None)
+        base = Path(sys.executable).parent if meipass else Path(__file__).parent
+        snapshot_file = base / "logs" / "metrics.json"
+        try:
+            snapshot_file.write_text(metrics.snapshot_json(), encoding="utf-8")
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot: %s", e)
+            return
+        _open_file(snapshot_file)
+
     def on_open_log(icon, item):
         """Open the log file."""
         meipass = getattr(sys, "_MEIPASS", None)
         base = Path(sys.executable).parent if meipass else Path(__file__).parent
         log_file = base / "logs" / "deadlock_rpc.log"
         if log_file.exists():
-            if platform.system() == "Windows":
-                os.startfile(str(log_file))
-            elif platform.system() == "Darwin":
-                os.system(f'open "{log_file}"')
-            else:
-                os.system(f'xdg-open "{log_file}"')
+            _open_file(log_file)
 
     def on_quit(icon, item):
         """Quit the application."""
@@ -70,6 +90,7 @@ def create_tray_icon(app):
         pystray.MenuItem("Deadlock RPC", None, enabled=False),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("Show Status", on_status),
+        pystray.MenuItem("Show Metrics", on_metrics),
         pystray.MenuItem("Open Log", on_open_log),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("Quit", on_quit),
@@ -82,21 +103,16 @@ def create_tray_icon(app):
         menu=menu,
     )
 
-    # update tooltip
-    def update_tooltip():
-        while app.running:
-            try:
-                phase = app.state.phase.name.replace("_", " ").title()
-                hero = app.state.hero_display_name
-                if hero:
-                    icon.title = f"Deadlock RPC — {hero} ({phase})"
-                else:
-                    icon.title = f"Deadlock RPC — {phase}"
-            except Exception:
-                pass
-            time.sleep(5)
-
-    tooltip_thread = threading.Thread(target=update_tooltip, daemon=True, name="tooltip")
-    tooltip_thread.start()
+    # update tooltip on hero / phase changes
+    def update_tooltip(state):
+        phase = state.phase.name.replace("_", " ").title()
+        hero = state.hero_display_name
+        if hero:
+            icon.title = f"Deadlock RPC — {hero} ({phase})"
+        else:
+            icon.title = f"Deadlock RPC — {phase}"
+
+    update_tooltip(app.snapshot)
+    app.bus.run("tooltip", lambda event: update_tooltip(event.snapshot), maxsize=1, kinds={"phase", "hero"})
 
     return icon
\ No newline at end of file
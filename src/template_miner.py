@@ -0,0 +1,230 @@
+"""
+Streaming log-template miner (Drain-style) for finding new log signals.
+
+Every line is masked (timestamp prefix dropped, tokens with digits, hex ids
+and quoted strings become <*>) and routed through a fixed-depth prefix tree:
+token count, then the first few tokens. The leaf holds a handful of
+templates; the line joins the most similar one (share of equal tokens) or
+starts a new one, and tokens that disagree become <*>.
+
+Memory is bounded regardless of log size: each tree node has at most
+MAX_CHILDREN children (extra tokens share a <*> branch), each leaf at most
+MAX_LEAF_CLUSTERS templates, and past MAX_CLUSTERS the least recently seen
+template is evicted. Per template we keep a count, the first line number and
+byte offset, and a few example lines.
+
+The log is replayed through LogWatcher at the same time, so templates that
+keep showing up within NEAR_LINES of a state transition, and that no
+configured pattern matches, are listed as candidate signals. That's where
+renamed lines after a game patch end up.
+
+    python parser.py console.log --templates [--top 40] [--out templates.json]
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import OrderedDict, deque
+from pathlib import Path
+
+WILDCARD = "<*>"
+DEPTH = 4               # token-count level + first DEPTH - 2 tokens
+MAX_CHILDREN = 64
+MAX_LEAF_CLUSTERS = 32
+MAX_CLUSTERS = 5000
+SIMILARITY = 0.5
+EXAMPLES = 3
+NEAR_LINES = 3
+MAX_TOKENS = 40         # very long lines are templated on their head
+
+_TS_PREFIX = re.compile(r"^\d\d/\d\d \d\d:\d\d:\d\d\s+")
+_QUOTED = re.compile(r"\"[^\"]*\"|'[^']*'")
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def tokenize(line: str) -> list[str]:
+    line = _TS_PREFIX.sub("", line)
+    line = _QUOTED.sub(WILDCARD, line)
+    tokens = line.split()[:MAX_TOKENS]
+    return [WILDCARD if _HAS_DIGIT.search(t) else t for t in tokens]
+
+
+class Cluster:
+    __slots__ = ("id", "tokens", "count", "first_line", "first_offset", "examples", "near", "known")
+
+    def __init__(self, cid: int, tokens: list[str], line_no: int, offset: int, text: str):
+        self.id = cid
+        self.tokens = tokens
+        self.count = 0
+        self.first_line = line_no
+        self.first_offset = offset
+        self.examples: list[str] = [text]
+        self.near = 0
+        self.known: str | None = None
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def similarity(self, tokens: list[str]) -> tuple[float, int]:
+        same = wild = 0
+        for a, b in zip(self.tokens, tokens):
+            if a == WILDCARD:
+                wild += 1
+            elif a == b:
+                same += 1
+        return same / len(tokens), wild
+
+    def merge(self, tokens: list[str]) -> None:
+        self.tokens = [a if a == b else WILDCARD for a, b in zip(self.tokens, tokens)]
+
+    def as_dict(self) -> dict:
+        return {
+            "template": self.template,
+            "count": self.count,
+            "first_line": self.first_line,
+            "first_offset": self.first_offset,
+            "near_transitions": self.near,
+            "known_pattern": self.known,
+            "examples": self.examples,
+        }
+
+
+class TemplateMiner:
+    def __init__(self, depth: int = DEPTH, similarity: float = SIMILARITY,
+                 max_children: int = MAX_CHILDREN, max_clusters: int = MAX_CLUSTERS):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.root: dict = {}
+        # id -> cluster, least recently seen first
+        self.clusters: OrderedDict[int, Cluster] = OrderedDict()
+        self._leaf_of: dict[int, list[Cluster]] = {}
+        self._next_id = 0
+        self.evicted = 0
+
+    def _leaf(self, tokens: list[str]) -> list[Cluster]:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[: self.depth - 2]:
+            if token in node:
+                node = node[token]
+            elif len(node) < self.max_children - 1:
+                node = node.setdefault(token, {})
+            else:
+                # a full node sends every new token down the shared <*> branch
+                node = node.setdefault(WILDCARD, {})
+        return node.setdefault(None, [])
+
+    def add(self, line: str, line_no: int = 0, offset: int = 0) -> Cluster:
+        tokens = tokenize(line) or [""]
+        leaf = self._leaf(tokens)
+
+        best, best_key = None, (-1.0, -1)
+        for c in leaf:
+            key = c.similarity(tokens)
+            if key > best_key:
+                best, best_key = c, key
+
+        if best is not None and best_key[0] >= self.similarity:
+            best.merge(tokens)
+            self.clusters.move_to_end(best.id)
+        else:
+            best = Cluster(self._next_id, tokens, line_no, offset, line.strip()[:300])
+            self._next_id += 1
+            if len(leaf) >= MAX_LEAF_CLUSTERS:
+                self._evict(leaf[0])
+            leaf.append(best)
+            self.clusters[best.id] = best
+            self._leaf_of[best.id] = leaf
+            if len(self.clusters) > self.max_clusters:
+                self._evict(next(iter(self.clusters.values())))
+
+        best.count += 1
+        if len(best.examples) < EXAMPLES and best.count > 1:
+            text = line.strip()[:300]
+            if text not in best.examples:
+                best.examples.append(text)
+        return best
+
+    def _evict(self, cluster: Cluster) -> None:
+        self._leaf_of.pop(cluster.id).remove(cluster)
+        del self.clusters[cluster.id]
+        self.evicted += 1
+
+
+def mine(log_path: str | Path, config: dict | None = None, near: int = NEAR_LINES,
+         miner: TemplateMiner | None = None) -> TemplateMiner:
+    """One pass over the log: cluster every line, replay transitions alongside."""
+    miner = miner or TemplateMiner()
+    watcher = None
+    if config is not None:
+        from parser import make_watcher
+        watcher = make_watcher(log_path, config)
+
+    recent: deque[Cluster] = deque(maxlen=near)
+    marked: set[int] = set()    # clusters already credited for the current window
+    after = 0                   # lines left in the window after a transition
+
+    offset = 0
+    with open(log_path, "rb") as f:
+        for i, raw in enumerate(f):
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            line_offset, offset = offset, offset + len(raw)
+            if not line.strip():
+                continue
+            cluster = miner.add(line, i, line_offset)
+
+            # classify and fold this one line, so its event pairs with its cluster
+            changed = False
+            if watcher is not None:
+                event = next(watcher.events([(i, line_offset, line.strip())]), None)
+                if event is not None:
+                    if event.kind and cluster.known is None:
+                        cluster.known = event.kind
+                    changed = watcher.apply_event(event)
+
+            if changed:
+                marked = {cluster.id}
+                for c in recent:
+                    if c.id not in marked:
+                        marked.add(c.id)
+                        c.near += 1
+                after = near
+            elif after:
+                after -= 1
+                if cluster.id not in marked:
+                    marked.add(cluster.id)
+                    cluster.near += 1
+            recent.append(cluster)
+    return miner
+
+
+def report(miner: TemplateMiner, top: int = 40) -> None:
+    clusters = sorted(miner.clusters.values(), key=lambda c: c.count, reverse=True)
+    total = sum(c.count for c in clusters)
+    print(f"{len(clusters)} templates over {total} lines"
+          + (f" ({miner.evicted} rare templates evicted)" if miner.evicted else "") + "\n")
+
+    print(f"── Top {min(top, len(clusters))} templates ──")
+    for c in clusters[:top]:
+        tag = f"[{c.known}]" if c.known else ""
+        print(f"  {c.count:>8}  L{c.first_line:<7} {tag:<18} {c.template[:110]}")
+    print()
+
+    # unknown lines that sit next to transitions: the likely new signals
+    candidates = [c for c in clusters if c.near and not c.known]
+    candidates.sort(key=lambda c: (c.near / c.count, c.near), reverse=True)
+    print("── Near transitions, not matched by any pattern ──")
+    if not candidates:
+        print("  (none)")
+    for c in candidates[:top]:
+        print(f"  {c.near:>5}/{c.count:<7} L{c.first_line:<7} @{c.first_offset:<10} {c.template[:100]}")
+        for ex in c.examples[:1]:
+            print(f"      e.g. {ex[:140]}")
+
+
+def write_json(miner: TemplateMiner, out_path: str | Path) -> None:
+    clusters = sorted(miner.clusters.values(), key=lambda c: c.count, reverse=True)
+    Path(out_path).write_text(json.dumps([c.as_dict() for c in clusters], indent=1), encoding="utf-8")
@@ -0,0 +1,152 @@
+"""
+End-to-end latency tracing: console.log write -> Discord activity.
+
+Enabled with DEADLOCK_RPC_TRACE=<output.json> (or config "trace_file"). For every
+state transition the watcher records when the log grew (file mtime), when the
+growth was noticed, when the batch was read, when the line was classified and
+applied, and DiscordRPC adds when the payload was built and when the IPC send
+returned. export_chrome() writes the records in Chrome trace-event format
+(open in chrome://tracing or https://ui.perfetto.dev).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# stage order; each stage is a wall-clock timestamp in µs
+STAGES = ("append", "detect", "read", "classify", "state_change", "payload", "ipc_send")
+
+
+def now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class TransitionTrace:
+    __slots__ = ("kind", "label", "stamps", "dropped")
+
+    def __init__(self, kind: str | None, stamps: dict[str, int]) -> None:
+        self.kind = kind
+        self.label = ""
+        self.stamps = stamps
+        self.dropped = False  # superseded by a newer state before it reached Discord
+
+    def to_dict(self) -> dict:
+        d = {"kind": self.kind, "label": self.label, **self.stamps}
+        if self.dropped:
+            d["dropped"] = True
+        return d
+
+
+class Batch:
+    """One readlines() batch; may contain several transitions."""
+
+    __slots__ = ("stamps", "transitions")
+
+    def __init__(self, append_us: int, detect_us: int) -> None:
+        self.stamps = {"append": min(append_us, detect_us), "detect": detect_us}
+        self.transitions: list[TransitionTrace] = []
+
+    def mark(self, stage: str) -> None:
+        now = now_us()
+        self.stamps[stage] = now
+        for tr in self.transitions:
+            tr.stamps.setdefault(stage, now)
+
+    def transition(self, kind: str | None, classify_us: int, label: str) -> None:
+        tr = TransitionTrace(kind, dict(self.stamps))
+        tr.stamps["classify"] = classify_us
+        tr.stamps["state_change"] = now_us()
+        tr.label = label
+        self.transitions.append(tr)
+
+
+class Tracer:
+    def __init__(self, path: str | Path | None, max_records: int = 5000) -> None:
+        self.path = Path(path) if path else None
+        self.records: deque[TransitionTrace] = deque(maxlen=max_records)
+        self._local = threading.local()
+
+    # -- watcher side ------------------------------------------------------
+
+    def begin_batch(self, append_mtime: float) -> Batch:
+        return Batch(int(append_mtime * 1_000_000), now_us())
+
+    def finish_batch(self, batch: Batch) -> None:
+        self.records.extend(batch.transitions)
+
+    def drop_batch(self, batch: Batch) -> None:
+        """Record a batch whose state was overtaken on the way to Discord (queue full, mailbox overwritten)."""
+        for tr in batch.transitions:
+            tr.dropped = True
+        self.finish_batch(batch)
+
+    # -- presence side -----------------------------------------------------
+    # The Discord sink's worker thread (sinks._Worker) parks the batch of the
+    # payload it is publishing in a thread-local, so DiscordRPC.update can stamp
+    # the payload / IPC stages, then finishes the batch once publish returns.
+
+    def set_current(self, batch: Batch | None) -> None:
+        self._local.batch = batch
+
+    def current(self) -> Batch | None:
+        return getattr(self._local, "batch", None)
+
+    # -- export ------------------------------------------------------------
+
+    def export_chrome(self, path: str | Path | None = None) -> Path | None:
+        """Write all recorded transitions as Chrome trace events."""
+        out = Path(path) if path else self.path
+        if out is None:
+            return None
+
+        events: list[dict] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "DeadlockRPC"}},
+        ]
+        for i, tr in enumerate(self.records, start=1):
+            stamps = [(s, tr.stamps[s]) for s in STAGES if s in tr.stamps]
+            if len(stamps) < 2:
+                continue
+            start, end = stamps[0][1], stamps[-1][1]
+            events.append({
+                "name": f"{tr.kind or '?'} → {tr.label}" + (" (dropped)" if tr.dropped else ""),
+                "cat": "transition",
+                "ph": "X", "pid": 1, "tid": i,
+                "ts": start, "dur": max(0, end - start),
+                "args": tr.to_dict(),
+            })
+            for (stage, ts), (next_stage, next_ts) in zip(stamps, stamps[1:]):
+                events.append({
+                    "name": f"{stage} → {next_stage}",
+                    "cat": "stage",
+                    "ph": "X", "pid": 1, "tid": i,
+                    "ts": ts, "dur": max(0, next_ts - ts),
+                })
+
+        tmp = out.with_suffix(out.suffix + ".tmp")
+        tmp.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        os.replace(tmp, out)
+        logger.info("Wrote %d transition traces to %s", len(self.records), out)
+        return out
+
+
+_tracer: Tracer | None = None
+
+
+def configure(path: str | Path | None) -> Tracer | None:
+    """Enable tracing if a path is given (env DEADLOCK_RPC_TRACE wins)."""
+    global _tracer
+    path = os.environ.get("DEADLOCK_RPC_TRACE") or path
+    _tracer = Tracer(path) if path else None
+    return _tracer
+
+
+def get() -> Tracer | None:
+    return _tracer
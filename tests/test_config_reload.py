@@ -0,0 +1,83 @@
+"""A changed config.json is validated off-thread and swapped in between batches."""
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from config_reload import ConfigReloader, validate
+from console_log import read_lines
+from parser import make_watcher
+
+LOG = Path(__file__).parent / "data" / "console.log"
+CONFIG = json.loads((Path(__file__).resolve().parents[1] / "src" / "config.json").read_text())
+
+
+class App:
+    running = True
+
+    def __init__(self):
+        self.applied = []
+
+    def apply_config(self, config, engine):
+        self.applied.append((config, engine))
+
+
+def with_changes(**changes) -> dict:
+    cfg = copy.deepcopy(CONFIG)
+    cfg.update(changes)
+    return cfg
+
+
+def test_validate_compiles_the_shipped_config():
+    engine = validate(CONFIG)
+    assert set(engine.patterns) == set(CONFIG["log_patterns"])
+
+
+@pytest.mark.parametrize("cfg", [
+    [],
+    with_changes(log_patterns={"map_info": 3}),
+    with_changes(log_patterns={"map_info": "Map: (unclosed"}),
+    with_changes(hideout_maps="dl_hideout"),
+    with_changes(map_to_mode=["street_test"]),
+    with_changes(update_interval_seconds=0),
+])
+def test_validate_rejects_a_broken_config(cfg):
+    with pytest.raises(ValueError):
+        validate(cfg)
+
+
+def test_reloader_applies_only_valid_changes(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(CONFIG))
+    app = App()
+    reloader = ConfigReloader(path, app)
+    assert not reloader.check()  # primed with what's on disk
+
+    path.write_text("{ not json")
+    assert not reloader.check()
+    path.write_text(json.dumps(with_changes(update_interval_seconds=-1)))
+    assert not reloader.check()
+    assert app.applied == []
+
+    good = with_changes(hideout_maps=["dl_hideout", "dl_hideout_v2"])
+    path.write_text(json.dumps(good))
+    assert reloader.check()
+    [(config, engine)] = app.applied
+    assert config == good
+    assert "dl_hideout_v2" in engine.hideout_maps
+
+
+def test_swapped_engine_takes_effect_with_the_next_batch():
+    watcher = make_watcher(LOG, CONFIG)
+    old = watcher.engine
+    patterns = {k: v for k, v in CONFIG["log_patterns"].items() if k != "loaded_hero"}
+    new = validate(with_changes(log_patterns=patterns))
+
+    watcher.swap_engine(new)
+    assert watcher.engine is old  # not mid-batch
+    kinds = {event.kind for event in watcher.events(read_lines(LOG))}
+    assert watcher.engine is new
+    assert "loaded_hero" not in kinds
+    assert "map_info" in kinds
@@ -0,0 +1,112 @@
+"""Every way of folding a log has to end up with the same transitions."""
+
+import json
+from pathlib import Path
+
+from console_log import read_lines
+from log_index import LogIndex
+from parallel_classify import chunk_spans, classify_file
+from parser import make_watcher
+
+LOG = Path(__file__).parent / "data" / "console.log"
+CONFIG = json.loads((Path(__file__).resolve().parents[1] / "src" / "config.json").read_text())
+
+
+def transitions(watcher, events) -> list[tuple]:
+    s = watcher.state
+    return [
+        (event.line_no, s.phase.name, s.hero_key, s.match_mode.name, s.map_name, s.party_size, s.match_start_time)
+        for event, changed in watcher.fold(events) if changed
+    ]
+
+
+def sequential() -> list[tuple]:
+    watcher = make_watcher(LOG, CONFIG)
+    return transitions(watcher, watcher.events(read_lines(LOG)))
+
+
+def test_fixture_has_transitions():
+    seen = sequential()
+    assert len(seen) > 20
+    assert {t[1] for t in seen} >= {"HIDEOUT", "PARTY_HIDEOUT", "IN_QUEUE", "IN_MATCH", "POST_MATCH", "NOT_RUNNING"}
+
+
+def test_parallel_fold_matches_sequential():
+    chunk_bytes = 512
+    assert len(chunk_spans(LOG, 0, LOG.stat().st_size, chunk_bytes)) > 2
+    watcher = make_watcher(LOG, CONFIG)
+    events = classify_file(LOG, watcher.engine, workers=2, chunk_bytes=chunk_bytes,
+                           line_time=watcher.clock.line_time)
+    assert transitions(watcher, events) == sequential()
+
+
+def test_indexed_fold_matches_sequential(tmp_path):
+    watcher = make_watcher(LOG, CONFIG)
+    index = LogIndex(LOG, watcher.engine, tmp_path / "console.idx")
+    index.update()
+    numbers = [n for n, _ in index.events()]
+    assert len(numbers) < index.line_count  # noise lines aren't indexed
+    indexed = ((n, index.offsets[n], text.strip()) for n, text in index.read_lines(numbers))
+    assert transitions(watcher, watcher.events(indexed)) == sequential()
+
+
+def test_indexed_resync_matches_plain_resync(tmp_path):
+    plain = make_watcher(LOG, CONFIG)
+    plain.resync_max_bytes = LOG.stat().st_size
+    plain.resync()
+
+    indexed = make_watcher(LOG, CONFIG)
+    indexed.resync_max_bytes = LOG.stat().st_size
+    indexed.index_path = tmp_path / "console.idx"
+    indexed.resync()
+
+    assert indexed.index_path.exists()
+    assert indexed.state.snapshot() == plain.state.snapshot()
+
+
+def test_shutdown_leaves_a_fresh_watcher(tmp_path):
+    # indexed resyncs start at the last shutdown, so folding up to one has to
+    # leave the watcher exactly as a new one (bar the account ID)
+    from keyframes import WATCHER_FIELDS
+
+    log = tmp_path / "console.log"
+    log.write_text(
+        '03/12 10:00:00 [Client] Map: "dl_hideout"\n'
+        "03/12 10:00:01 [HostStateManager] Host activate: Loading (dl_hideout)\n"
+        "03/12 10:00:02 [Server] Loaded hero 1/hero_inferno\n"
+        "03/12 10:00:03 [Client] CL:  Connected to 'loopback' [U:1:12345]\n"
+        "03/12 10:00:04 CMsgGCToClientPartyEvent: { party_id: 777 event: k_eJoinedParty initiator_account_id: 67890 }\n"
+        "03/12 10:00:05 Dispatching EventAppShutdown_t\n"
+    )
+    folded = make_watcher(log, CONFIG)
+    for _ in folded.fold(folded.events(read_lines(log))):
+        pass
+    fresh = make_watcher(log, CONFIG)
+    fresh._local_account_id = folded._local_account_id
+    for name in WATCHER_FIELDS + ("_party_members",):
+        assert getattr(folded, name) == getattr(fresh, name), name
+
+
+def test_bus_hears_every_payload_change(tmp_path):
+    # file/HTTP/stream/shm sinks only ever see what comes over the bus, so
+    # a player count moving mid-match (no phase/hero/mode change) must too
+    from events import EventBus
+    from sinks import build_payload
+
+    def visible(snapshot) -> dict:
+        data = build_payload(snapshot)
+        del data["version"], data["updated"]
+        return data
+
+    lines = LOG.read_text().splitlines(keepends=True)
+    in_match = next(i for i, line in enumerate(lines) if "GameInProgress" in line)
+    lines.insert(in_match + 1, "03/12 10:01:00 [Client] Players: 11 (6 bots) / 11 humans\n")
+    log = tmp_path / "console.log"
+    log.write_text("".join(lines))
+
+    watcher = make_watcher(log, CONFIG)
+    watcher.bus = EventBus()
+    sub = watcher.bus.subscribe("test", maxsize=10_000)
+    for _, _, text in read_lines(log):
+        watcher._process_batch([text])
+        assert visible(sub._events[-1].snapshot) == visible(watcher.snapshot), text
@@ -0,0 +1,84 @@
+"""Match history: the recorder opens and closes rows, the queries read them back."""
+
+import sqlite3
+from dataclasses import replace
+
+from clock import SimulatedClock
+from game_state import GamePhase, GameSnapshot, MatchMode
+from history import MatchHistory, MatchRecorder
+
+T0 = 1_700_000_000.0
+
+
+def at(clock, t, **fields) -> GameSnapshot:
+    clock.now = T0 + t
+    return GameSnapshot(clock=clock, **fields)
+
+
+def play(recorder, clock, start, hero, mode=MatchMode.UNRANKED, length=1800.0):
+    lobby = dict(session_start_time=T0, hero_key=hero, match_mode=mode, party_size=2)
+    recorder.observe(at(clock, start, phase=GamePhase.PARTY_HIDEOUT, **lobby))
+    intro = at(clock, start + 10, phase=GamePhase.MATCH_INTRO, map_name="street_test", **lobby)
+    recorder.observe(intro)
+    recorder.observe(replace(intro, phase=GamePhase.IN_MATCH, match_start_time=T0 + start + 10))
+    recorder.observe(at(clock, start + 10 + length, phase=GamePhase.POST_MATCH, **lobby))
+
+
+def test_recorder_writes_sessions_and_matches(tmp_path):
+    clock = SimulatedClock()
+    history = MatchHistory(tmp_path / "history.db", flush_interval=0.01)
+    recorder = MatchRecorder(history)
+
+    play(recorder, clock, 0, "hero_inferno")
+    assert recorder.current_match_start() is None
+    play(recorder, clock, 3600, "hero_inferno", length=1200.0)
+    play(recorder, clock, 7200, "hero_haze", mode=MatchMode.SANDBOX)
+    recorder.observe(at(clock, 10000, phase=GamePhase.NOT_RUNNING))
+    history.close()
+
+    with sqlite3.connect(tmp_path / "history.db") as db:
+        sessions = db.execute("SELECT start, end FROM sessions").fetchall()
+        matches = db.execute("SELECT start, duration, hero, mode, map, party_size FROM matches ORDER BY start").fetchall()
+    assert sessions == [(T0, T0 + 10000)]
+    assert matches == [
+        (T0 + 10, 1800.0, "hero_inferno", "UNRANKED", "street_test", 2),
+        (T0 + 3610, 1200.0, "hero_inferno", "UNRANKED", "street_test", 2),
+        (T0 + 7210, 1800.0, "hero_haze", "SANDBOX", "street_test", 2),
+    ]
+
+
+def test_close_ends_an_open_match(tmp_path):
+    clock = SimulatedClock()
+    history = MatchHistory(tmp_path / "history.db", flush_interval=0.01)
+    recorder = MatchRecorder(history)
+    recorder.observe(at(clock, 0, phase=GamePhase.IN_MATCH, hero_key="hero_inferno", match_start_time=T0))
+    assert recorder.current_match_start() == T0
+
+    recorder.close(T0 + 600)
+    history.close()
+    with sqlite3.connect(tmp_path / "history.db") as db:
+        assert db.execute("SELECT duration FROM matches").fetchall() == [(600.0,)]
+        assert db.execute("SELECT start, end FROM sessions").fetchall() == [(T0, T0 + 600)]
+
+
+def test_queries(tmp_path):
+    path = tmp_path / "history.db"
+    history = MatchHistory(path, flush_interval=0.01)
+    recorder = MatchRecorder(history)
+    clock = SimulatedClock()
+    play(recorder, clock, 0, "hero_inferno")
+    play(recorder, clock, 3600, "hero_inferno", length=1200.0)
+    play(recorder, clock, 7200, "hero_haze", mode=MatchMode.SANDBOX)
+    history.close()
+
+    history = MatchHistory(path)  # queries see what an earlier run wrote
+    try:
+        assert history.matches_since(T0) == 3
+        assert history.matches_since(T0 + 3600) == 2
+        assert history.hero_seconds("hero_inferno") == 3000.0
+        assert history.hero_seconds("hero_inferno", since=T0 + 3600) == 1200.0
+        assert history.hero_seconds("hero_wraith") == 0
+        assert history.mode_counts() == {"UNRANKED": 2, "SANDBOX": 1}
+        assert history.mode_counts(since=T0 + 7000) == {"SANDBOX": 1}
+    finally:
+        history.close()
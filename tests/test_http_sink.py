@@ -0,0 +1,73 @@
+"""The loopback state API: ETags, 304s and the ?wait long-poll."""
+
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from game_state import GamePhase, GameSnapshot
+from sinks import HttpSink, Payload
+
+
+@pytest.fixture
+def sink():
+    sink = HttpSink(0)
+    sink.start()
+    yield sink
+    sink.close()
+
+
+def get(sink, path="/state", etag=None):
+    conn = http.client.HTTPConnection("127.0.0.1", sink._server.server_address[1], timeout=10)
+    try:
+        conn.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+        response = conn.getresponse()
+        return response.status, response.getheader("ETag"), response.read()
+    finally:
+        conn.close()
+
+
+def publish(sink, version, phase=GamePhase.HIDEOUT):
+    sink.publish(Payload(GameSnapshot(phase=phase, version=version)))
+
+
+def test_etag_follows_the_state_version(sink):
+    publish(sink, 1)
+    status, etag, body = get(sink)
+    assert status == 200
+    assert etag.endswith('-1"')
+    assert json.loads(body)["phase"] == "HIDEOUT"
+
+    assert get(sink, etag=etag)[:2] == (304, etag)
+    publish(sink, 2, GamePhase.IN_QUEUE)
+    status, new_etag, body = get(sink, etag=etag)
+    assert status == 200 and new_etag != etag
+    assert json.loads(body)["phase"] == "IN_QUEUE"
+
+
+def test_wait_returns_on_the_next_publish(sink):
+    publish(sink, 1)
+    etag = get(sink)[1]
+    timer = threading.Timer(0.2, publish, (sink, 2, GamePhase.IN_QUEUE))
+    timer.start()
+    t = time.monotonic()
+    status, new_etag, body = get(sink, "/state?wait=5", etag)
+    timer.join()
+    assert status == 200
+    assert new_etag.endswith('-2"')
+    assert json.loads(body)["phase"] == "IN_QUEUE"
+    assert 0.1 < time.monotonic() - t < 5
+
+
+def test_wait_times_out_with_304(sink):
+    publish(sink, 1)
+    etag = get(sink)[1]
+    t = time.monotonic()
+    assert get(sink, "/state?wait=0.3", etag)[:2] == (304, etag)
+    assert time.monotonic() - t >= 0.3
+
+
+def test_bad_wait_is_rejected(sink):
+    assert get(sink, "/state?wait=soon")[0] == 400
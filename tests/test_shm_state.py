@@ -0,0 +1,84 @@
+"""Shared-memory state block: what the writer packs, read_block gets back whole."""
+
+import mmap
+import sys
+import threading
+
+import pytest
+
+from game_state import GamePhase, GameSnapshot, MatchMode
+from shm_state import SEQ_OFFSET, SIZE, SharedStateBlock, read_block
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="file-backed block")
+
+
+@pytest.fixture
+def block(tmp_path):
+    block = SharedStateBlock(str(tmp_path / "state"))
+    yield block
+    block.close()
+
+
+def reader(block):
+    with open(block.path, "rb") as f:
+        return mmap.mmap(f.fileno(), SIZE, access=mmap.ACCESS_READ)
+
+
+def test_round_trip(block):
+    block.write(GameSnapshot(
+        phase=GamePhase.IN_MATCH, match_mode=MatchMode.UNRANKED, hero_key="inferno",
+        is_transformed=True, party_size=3, match_start_time=1_700_000_100.0,
+        session_start_time=1_700_000_000.0, last_update=1_700_000_200.0, version=7,
+    ))
+    mm = reader(block)
+    assert read_block(mm) == {
+        "version": 7,
+        "phase": "IN_MATCH",
+        "mode": "UNRANKED",
+        "hero": "inferno",
+        "party_size": 3,
+        "transformed": True,
+        "in_match": True,
+        "match_start": 1_700_000_100.0,
+        "session_start": 1_700_000_000.0,
+        "updated": 1_700_000_200.0,
+    }
+    assert int.from_bytes(mm[SEQ_OFFSET:SEQ_OFFSET + 8], "little") == 2  # even once written
+    mm.close()
+
+
+def test_empty_fields_read_as_none(block):
+    block.write(GameSnapshot(phase=GamePhase.MAIN_MENU, version=1))
+    state = read_block(block.mm)
+    assert state["hero"] is None and state["match_start"] is None and state["session_start"] is None
+    assert not state["in_match"]
+
+
+def test_write_in_progress_is_never_returned(block):
+    block.write(GameSnapshot(version=1))
+    torn = bytearray(block.mm[:])
+    torn[SEQ_OFFSET:SEQ_OFFSET + 8] = (3).to_bytes(8, "little")  # odd: writer is mid-update
+    assert read_block(bytes(torn), retries=10) is None
+    assert read_block(b"\0" * SIZE) is None  # no magic, no block
+
+
+def test_concurrent_reads_are_consistent(block):
+    # every write keeps version and party size in step; a torn read would split them
+    done = threading.Event()
+
+    def write():
+        for version in range(1, 5001):
+            block.write(GameSnapshot(version=version, party_size=version % 6 + 1, hero_key=f"hero{version}"))
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    mm = reader(block)
+    while not done.is_set():
+        state = read_block(mm)
+        if state and state["version"]:
+            assert state["party_size"] == state["version"] % 6 + 1
+            assert state["hero"] == f"hero{state['version']}"
+    writer.join()
+    mm.close()
+    assert read_block(block.mm)["version"] == 5000